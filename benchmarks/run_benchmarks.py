@@ -0,0 +1,172 @@
+"""Time and memory-profile the result-processing pipeline on synthetic output.xml files.
+
+Every phase runs in a fresh process so its peak RSS is not polluted by
+earlier phases, and the import time of each entry point is measured in a
+fresh interpreter. Results are written as JSON for regression tracking.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "functions")
+sys.path.insert(0, os.path.abspath(FUNCTIONS_DIR))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_output import generate_shards  # noqa: E402
+
+PHASES = ("discovery", "parse", "report", "merge")
+DEFAULT_SCALES = "1000,10000,100000"
+
+
+def _shard_files(base_dir):
+    from merge_reports import find_results_directories, find_robot_results
+    return [f for d in find_results_directories(base_dir) for f in find_robot_results(d)]
+
+
+def _parse(base_dir, engine, report_dir):
+    from display_test_results import MyResultVisitor
+    from stream_results import load_result
+
+    visitor = MyResultVisitor(markdown_file=os.path.join(report_dir, "report.md"))
+    for output_file in _shard_files(base_dir):
+        load_result(output_file, engine).visit(visitor)
+    return visitor
+
+
+def phase_discovery(base_dir, engine, work_dir):
+    return len(_shard_files(base_dir)), None
+
+
+def phase_parse(base_dir, engine, work_dir):
+    return _parse(base_dir, engine, work_dir).store.count(), None
+
+
+def phase_report(base_dir, engine, work_dir):
+    visitor = _parse(base_dir, engine, work_dir)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    visitor.write_report()
+    # Only the write itself is timed; parsing is a separate phase.
+    return visitor.store.count(), (time.perf_counter() - wall_start, time.process_time() - cpu_start)
+
+
+def phase_merge(base_dir, engine, work_dir):
+    from merge_reports import find_results_directories, merge_reports
+    merged = merge_reports(find_results_directories(base_dir), os.path.join(work_dir, "merged"))
+    return int(bool(merged)), None
+
+
+def run_measured(phase, base_dir, engine, work_dir):
+    """Run one phase in this (fresh) process and return its wall/CPU time and peak RSS."""
+    func = globals()[f"phase_{phase}"]
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    items, timed = func(base_dir, engine, work_dir)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    if timed is not None:
+        wall, cpu = timed
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb //= 1024
+    return {
+        "items": items,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_kb": peak_rss_kb,
+    }
+
+
+def run_phase_isolated(phase, base_dir, engine, work_dir):
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_measured, phase, base_dir, engine, work_dir).result()
+
+
+def directory_bytes(base_dir):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(base_dir) for f in files)
+
+
+def run_benchmarks(scales, engines, phases, shards, keyword_depth, message_size, failure_ratio, seed,
+                   work_root, max_merge_tests):
+    results = []
+    for tests in scales:
+        scale_dir = tempfile.mkdtemp(prefix=f"bench-{tests}-", dir=work_root)
+        base_dir = os.path.join(scale_dir, "robot-test-results")
+        try:
+            start = time.perf_counter()
+            generate_shards(base_dir, tests, shards, keyword_depth, message_size, failure_ratio, seed)
+            input_bytes = directory_bytes(base_dir)
+            print(f"📝 {tests} tests in {shards} shards: {input_bytes / 1e6:.1f} MB "
+                  f"generated in {time.perf_counter() - start:.1f}s")
+
+            for phase in phases:
+                if phase == "merge" and tests > max_merge_tests:
+                    print(f"⏭️ Skipping merge for {tests} tests (above --max-merge-tests)")
+                    continue
+                # Discovery and merge do not depend on the parse engine.
+                for engine in engines if phase in ("parse", "report") else (None,):
+                    metrics = run_phase_isolated(phase, base_dir, engine, scale_dir)
+                    row = {
+                        "tests": tests, "shards": shards, "keyword_depth": keyword_depth,
+                        "message_size": message_size, "failure_ratio": failure_ratio, "seed": seed,
+                        "input_bytes": input_bytes, "phase": phase, "engine": engine, **metrics,
+                    }
+                    results.append(row)
+                    label = f"{phase}[{engine}]" if engine else phase
+                    print(f"⏱️ {tests:>8} {label:<16} {metrics['wall_s']:>9.3f}s wall "
+                          f"{metrics['cpu_s']:>9.3f}s cpu {metrics['peak_rss_kb'] / 1024:>8.1f} MB peak")
+        finally:
+            shutil.rmtree(scale_dir, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Robot result-processing pipeline")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Comma-separated test counts, e.g. 1000,1000000")
+    parser.add_argument("--engines", default="robot,stream,triage", help="Comma-separated parse engines to compare")
+    parser.add_argument("--phases", default=",".join(PHASES), help=f"Comma-separated phases ({', '.join(PHASES)})")
+    parser.add_argument("--shards", type=int, default=4, help="Number of output.xml shards per scale")
+    parser.add_argument("--keyword-depth", type=int, default=2, help="Nesting depth of keywords per test")
+    parser.add_argument("--message-size", type=int, default=64, help="Characters per keyword log message")
+    parser.add_argument("--failure-ratio", type=float, default=0.01, help="Fraction of tests that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generator")
+    parser.add_argument("--max-merge-tests", type=int, default=100000, help="Skip the rebot merge above this scale")
+    parser.add_argument("--work-dir", default=None, help="Where to generate shards (default: system temp dir)")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write results to")
+    args = parser.parse_args()
+
+    rows = run_benchmarks(
+        scales=[int(s) for s in args.scales.split(",") if s],
+        engines=[e for e in args.engines.split(",") if e],
+        phases=[p for p in args.phases.split(",") if p],
+        shards=args.shards,
+        keyword_depth=args.keyword_depth,
+        message_size=args.message_size,
+        failure_ratio=args.failure_ratio,
+        seed=args.seed,
+        work_root=args.work_dir,
+        max_merge_tests=args.max_merge_tests,
+    )
+
+    # Cold-start cost of each entry point, paid once per workflow step regardless of scale.
+    from cli import IMPORT_MODULES
+    from instrumentation import measure_import
+
+    imports = [measure_import(module, cwd=os.path.abspath(FUNCTIONS_DIR)) for module in IMPORT_MODULES]
+    for row in imports:
+        print(f"📦 import {row['module']:<22} {row['import_ms']}ms import {row['process_ms']:>8.1f}ms process "
+              f"{', '.join(row['heavy']) or ''}")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"python": platform.python_version(), "platform": platform.platform(), "results": rows,
+                   "imports": imports}, f, indent=2)
+    print(f"📄 Results written to {args.output}")
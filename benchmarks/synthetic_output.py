@@ -0,0 +1,126 @@
+"""Deterministic synthetic Robot Framework output.xml generator for benchmarks."""
+import os
+import random
+import argparse
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape, quoteattr
+
+EPOCH = datetime(2024, 1, 1, 0, 0, 0)
+TESTS_PER_SUITE = 50
+
+
+class SyntheticClock:
+    """Monotonic fake clock so timestamps are reproducible."""
+
+    def __init__(self, start=EPOCH):
+        self.now = start
+
+    def tick(self, seconds):
+        start = self.now
+        self.now += timedelta(seconds=seconds)
+        return start
+
+    @staticmethod
+    def iso(dt):
+        return dt.isoformat(timespec="microseconds")
+
+
+def shard_sizes(tests, shards):
+    """Split `tests` as evenly as possible over `shards`."""
+    base, extra = divmod(tests, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def write_keyword(out, clock, rng, depth, message_size, failed):
+    """Write one keyword with `depth - 1` nested keywords and return its elapsed seconds."""
+    start = clock.now
+    out.write(f'<kw name="Keyword Level {depth}" owner="Synthetic">\n')
+    message = escape(("x" * message_size)) if message_size else ""
+    out.write(f'<msg time="{clock.iso(clock.tick(0.001))}" level="INFO">{message}</msg>\n')
+    if depth > 1:
+        write_keyword(out, clock, rng, depth - 1, message_size, failed)
+    else:
+        clock.tick(rng.uniform(0.001, 0.05))
+    elapsed = (clock.now - start).total_seconds()
+    status = "FAIL" if failed else "PASS"
+    text = f">Synthetic failure {rng.randrange(10000)}</status>" if failed else "/>"
+    out.write(f'<status status="{status}" start="{clock.iso(start)}" elapsed="{elapsed:.6f}"{text}\n')
+    out.write("</kw>\n")
+    return elapsed
+
+
+def write_output(path, tests, keyword_depth=2, message_size=64, failure_ratio=0.01, seed=0, shard_index=0):
+    """Write a synthetic RF 7 (schema 5) output.xml with `tests` tests and return (passed, failed)."""
+    rng = random.Random(f"{seed}-{shard_index}")
+    clock = SyntheticClock(EPOCH + timedelta(seconds=shard_index))
+    passed = failed = 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    with open(path, "w", encoding="utf-8") as out:
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write(f'<robot generator="Robot 7.0 (synthetic)" generated="{clock.iso(clock.now)}" '
+                  'rpa="false" schemaversion="5">\n')
+        top_start = clock.now
+        out.write(f'<suite id="s1" name="Synthetic {shard_index}" source="/synthetic/shard_{shard_index}">\n')
+
+        suite_count = max(1, (tests + TESTS_PER_SUITE - 1) // TESTS_PER_SUITE)
+        written = 0
+        for suite_index in range(1, suite_count + 1):
+            suite_start = clock.now
+            suite_failed = False
+            source = f"/synthetic/shard_{shard_index}/suite_{suite_index}.robot"
+            out.write(f'<suite id="s1-s{suite_index}" name="Suite {suite_index}" source={quoteattr(source)}>\n')
+            for test_index in range(1, min(TESTS_PER_SUITE, tests - written) + 1):
+                is_failure = rng.random() < failure_ratio
+                test_start = clock.now
+                out.write(f'<test id="s1-s{suite_index}-t{test_index}" name="Test {suite_index}.{test_index}" '
+                          f'line="{test_index * 3}">\n')
+                write_keyword(out, clock, rng, keyword_depth, message_size, is_failure)
+                out.write(f'<tag>tag-{test_index % 7}</tag>\n')
+                elapsed = (clock.now - test_start).total_seconds()
+                if is_failure:
+                    failed += 1
+                    suite_failed = True
+                    out.write(f'<status status="FAIL" start="{clock.iso(test_start)}" elapsed="{elapsed:.6f}">'
+                              f'Synthetic failure in test {test_index}: value {rng.randrange(100000)} != 0</status>\n')
+                else:
+                    passed += 1
+                    out.write(f'<status status="PASS" start="{clock.iso(test_start)}" elapsed="{elapsed:.6f}"/>\n')
+                out.write("</test>\n")
+                written += 1
+            elapsed = (clock.now - suite_start).total_seconds()
+            out.write(f'<status status="{"FAIL" if suite_failed else "PASS"}" start="{clock.iso(suite_start)}" '
+                      f'elapsed="{elapsed:.6f}"/>\n</suite>\n')
+
+        elapsed = (clock.now - top_start).total_seconds()
+        out.write(f'<status status="{"FAIL" if failed else "PASS"}" start="{clock.iso(top_start)}" '
+                  f'elapsed="{elapsed:.6f}"/>\n</suite>\n')
+        out.write(f'<statistics>\n<total>\n<stat pass="{passed}" fail="{failed}" skip="0">All Tests</stat>\n'
+                  '</total>\n<tag>\n</tag>\n<suite>\n</suite>\n</statistics>\n<errors>\n</errors>\n</robot>\n')
+    return passed, failed
+
+
+def generate_shards(base_dir, tests, shards=1, keyword_depth=2, message_size=64, failure_ratio=0.01, seed=0):
+    """Write `shards` robot-test-results-<n>/output.xml files under base_dir and return their paths."""
+    paths = []
+    for index, size in enumerate(shard_sizes(tests, shards)):
+        path = os.path.join(base_dir, f"robot-test-results-{index}", "output.xml")
+        write_output(path, size, keyword_depth, message_size, failure_ratio, seed, index)
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic Robot Framework output.xml shards")
+    parser.add_argument("--output-dir", default="robot-test-results", help="Directory to write shards into")
+    parser.add_argument("--tests", type=int, default=1000, help="Total number of tests")
+    parser.add_argument("--shards", type=int, default=1, help="Number of output.xml shards")
+    parser.add_argument("--keyword-depth", type=int, default=2, help="Nesting depth of keywords per test")
+    parser.add_argument("--message-size", type=int, default=64, help="Characters per keyword log message")
+    parser.add_argument("--failure-ratio", type=float, default=0.01, help="Fraction of tests that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    for path in generate_shards(args.output_dir, args.tests, args.shards, args.keyword_depth,
+                                args.message_size, args.failure_ratio, args.seed):
+        print(f"📝 Wrote {path}")
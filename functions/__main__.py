@@ -0,0 +1,5 @@
+"""Allows `python functions <command>`; see cli.py."""
+import sys
+from cli import main
+
+sys.exit(main())
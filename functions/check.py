@@ -1,9 +1,18 @@
 import os
-import requests
-import time
-from datetime import datetime
-from robot.api import ExecutionResult
+import argparse
+from functools import partial
 from display_test_results import MyResultVisitor
+from failure_clusters import cluster_failures, clusters_markdown, record_failures
+from github_checks import ChecksClient, ChecksError, check_conclusion, check_title, failure_annotations
+from instrumentation import Tracer, tracer_from_env
+from markdown_report import CLUSTER_HEADING, GITHUB_SUMMARY_LIMIT, full_report_path, truncation_note
+from result_index import cache_key_path
+from rerun_merge import FLAKY_HEADING, flaky_markdown, reduce_summaries, test_key
+from stream_results import ENGINES, load_result
+from summary_cache import DEFAULT_CACHE_PATH, SummaryCache, cached_map
+from timing import build_timing_model, shard_elapsed, slowest, timing_markdown
+
+SUMMARY_CACHE_KIND = "check-summary-v6"
 
 
 def get_env_variable(name):
@@ -29,13 +38,6 @@ def post_github_check(results, report_content):
         print("Error: Missing required environment variables. Exiting...")
         return
 
-    api_url = f"https://api.github.com/repos/{repository}/check-runs"
-    headers = {
-        "Accept": "application/vnd.github.v3+json",
-        "Authorization": f"Bearer {github_token}",
-        "Content-Type": "application/json"
-    }
-
     total_tests = results.get("total", 0)
     passed_tests = results.get("passed", 0)
     failed_tests = results.get("failed", 0)
@@ -43,7 +45,7 @@ def post_github_check(results, report_content):
     minutes, seconds = divmod(duration, 60)
 
 
-    conclusion = "success" if failed_tests == 0 else "failure"
+    conclusion = check_conclusion(failed_tests)
 
     summary = (f"{report_content}")
 
@@ -55,47 +57,96 @@ def post_github_check(results, report_content):
         "status": "completed",
         "conclusion": conclusion,
         "output": {
-            "title": f"Test Results - {job_name} executed in {int(minutes)}m {int(seconds)}s",
+            "title": check_title(job_name, minutes, seconds),
             "summary": summary
         }
     }
 
-    response = requests.post(api_url, headers=headers, json=payload)
-
-    if response.status_code == 201:
+    with ChecksClient(github_token, repository) as client:
+        try:
+            check_run = client.create_check_run(payload)
+        except ChecksError as error:
+            print(f"❌ Failed to post GitHub check: {error}")
+            return
         print("✅ GitHub check posted successfully")
-    else:
-        print(f"❌ Failed to post GitHub check: {response.status_code} - {response.text}")
-
 
-def run_robot_tests():
-    """Run Robot Framework tests, parse results, and post them to GitHub."""
+        annotations = list(failure_annotations(results.get("failed_tests", [])))
+        if annotations:
+            try:
+                client.add_annotations(check_run["id"], payload["output"], annotations)
+                print(f"📌 Added {len(annotations)} failure annotations")
+            except ChecksError as error:
+                print(f"⚠️ Failed to add failure annotations: {error}")
+
+
+def run_robot_tests(engine="robot", jobs=1, cache=None, tracer=None, trace_markdown=False,
+                    cluster=False, similarity=None, use_index=True):
+    """Parse the output.xml files under ./merged-results and post them to GitHub as a check run.
+
+    `engine` picks the result parser, which reads a file's binary index
+    instead when `use_index` is set. `jobs` processes parse the files, and a
+    `cache` (SummaryCache) skips those already summarized. A test found in
+    several files counts once, with its latest status. `cluster` and
+    `similarity` add a failures-by-cause section; `tracer` times each phase
+    and `trace_markdown` appends that timing to the report.
+    """
+    tracer = tracer or Tracer()
     print(f"Current Working Directory: {os.getcwd()}")
     main_dir = './merged-results'  # Main directory where subdirectories with output.xml are located
     report_file = os.path.abspath('./webapp_tests/robot-test-results/report.md')
 
     # Collect all output.xml files from subdirectories
-    output_files = find_output_files(main_dir)
+    with tracer.span("discover"):
+        output_files = find_output_files(main_dir)
 
     if not output_files:
         print(f"❌ Error: No output.xml files found in {main_dir}.")
         return
 
-    test_results = {"total": 0, "passed": 0, "failed": 0, "duration": 0.0}
-    
-    # Process each output.xml and combine the results
+    valid_files = []
     for output_file in output_files:
         print(f"Processing: {output_file}")
         if validate_output_file(output_file):
-            individual_results = process_test_results(output_file, report_file)
-            test_results["total"] += individual_results["total"]
-            test_results["passed"] += individual_results["passed"]
-            test_results["failed"] += individual_results["failed"]
-            test_results["duration"] += individual_results["duration"]
+            valid_files.append(output_file)
+
+    # Process each output.xml and combine the results
+    worker = partial(summarize_output_file, report_file=report_file, engine=engine, use_index=use_index)
+    with tracer.span("parse", shards=len(valid_files), jobs=jobs):
+        summaries = cached_map(cache, f"{SUMMARY_CACHE_KIND}:{engine}", worker, valid_files, jobs,
+                               tracer=tracer, span_name="parse_shard", key=cache_key_path if use_index else None)
+    with tracer.span("reduce", shards=len(summaries)):
+        test_results = reduce_summaries(summaries)
+    if test_results["reruns"]:
+        print(f"🔁 {test_results['reruns']} rerun attempts merged; "
+              f"{len(test_results['flaky_tests'])} flaky tests")
+
+    # Shards run in parallel, so the run takes as long as its critical path, not the sum of shards.
+    timing = build_timing_model(summaries)
+    test_results["duration"] = timing["wall_s"]
+    test_results["shard_duration"] = timing["shard_s"]
+    test_results["timing"] = timing
+    timing_section = timing_markdown(timing)
 
     # Read the report content
-    report_content = read_report_file(report_file)
-    post_github_check(test_results, report_content)
+    with tracer.span("read_report"):
+        report_content = read_report_file(report_file)
+    sections = [timing_section]
+    if test_results["flaky_tests"] and FLAKY_HEADING not in report_content:
+        sections.insert(0, flaky_markdown(test_results["flaky_tests"]))
+    if cluster and CLUSTER_HEADING in report_content:
+        print("🧩 report.md already groups failures by cause; not adding them again")
+    elif cluster and test_results["failed_tests"]:
+        with tracer.span("cluster", failures=len(test_results["failed_tests"])):
+            clusters = cluster_failures(record_failures(test_results["failed_tests"]), similarity)
+        sections.insert(0, clusters_markdown(clusters))
+    if trace_markdown and tracer.enabled:
+        sections.append(tracer.summary_markdown())
+    full_report_file = full_report_path(report_file)
+    report_content = append_sections(report_content, sections,
+                                     full_report_file if os.path.isfile(full_report_file) else None)
+    with tracer.span("post_github_check"):
+        post_github_check(test_results, report_content)
+    tracer.finish()
 
 
 def find_output_files(main_dir):
@@ -115,42 +166,105 @@ def validate_output_file(output_file):
     return exists
 
 
-def process_test_results(output_file: str, report_file: str) -> dict:
+def process_test_results(output_file: str, report_file: str, engine: str = "robot") -> dict:
     """Processes Robot Framework test results and returns structured data."""
-    result = ExecutionResult(output_file)
-    visitor = MyResultVisitor(markdown_file=report_file)
-    result.visit(visitor)
-
-    total_tests = len(visitor.passed_tests) + len(visitor.failed_tests)
-    passed_tests = len(visitor.passed_tests)
-    failed_tests = len(visitor.failed_tests)
-
-    generated_timestamp_str = getattr(result.suite, "starttime", None)
-    if generated_timestamp_str is None:
+    summary = summarize_output_file(output_file, report_file, engine)
+    if summary["starttime"] is None:
         raise AttributeError("ExecutionResult.suite has no attribute 'starttime'. "
                              "Check the correct attribute name in the Robot Framework API.")
+    return dict(summary, duration=round(summary["elapsed"], 2))
+
+
+def summarize_output_file(output_file: str, report_file: str, engine: str = "robot", use_index: bool = False) -> dict:
+    """Parses one output.xml (or its binary index) into a cacheable summary: counts, suite times and failed tests."""
+    result = load_result(output_file, engine, use_index)
+    visitor = MyResultVisitor(markdown_file=report_file)
+    result.visit(visitor)
 
-    generated_timestamp = datetime.strptime(generated_timestamp_str, "%Y%m%d %H:%M:%S.%f").timestamp()
-    duration = round(time.time() - generated_timestamp, 2)
+    store = visitor.store
+    starttime = getattr(result.suite, "starttime", None)
+    endtime = getattr(result.suite, "endtime", None)
 
     return {
-        "total": total_tests,
-        "passed": passed_tests,
-        "failed": failed_tests,
-        "duration": duration
+        "total": store.count(),
+        "passed": store.count("PASS"),
+        "failed": store.count("FAIL"),
+        "skipped": store.count("SKIP"),
+        "starttime": starttime,
+        "endtime": endtime,
+        "elapsed": shard_elapsed(starttime, endtime),
+        "slowest_tests": slowest((test.elapsed, test.longname) for test in store.iter_tests()),
+        "slowest_suites": slowest(visitor.suite_times),
+        "failed_tests": [test.to_record() for test in store.iter_tests("FAIL")],
+        "tests": [[test_key(test.longname), test.status] for test in store.iter_tests()],
+        "flaky_tests": [test.to_record() for test in store.iter_tests() if test.flaky],
+        "reruns": store.reruns,
     }
 
 
-def read_report_file(report_file: str) -> str:
-    """Reads and returns the content of the report.md file."""
+def append_sections(report_content: str, sections: list, full_report_file: str = None) -> str:
+    """Appends extra Markdown sections, trimming the report so the whole summary fits GitHub's limit.
+
+    A trimmed report is cut after its last whole line and ends with the same
+    truncation note as report.md itself.
+    """
+    extra = "".join(f"\n{section}" for section in sections)
+    budget = max(GITHUB_SUMMARY_LIMIT - len(extra), 0)
+    if len(report_content) <= budget:
+        return report_content + extra
+    note = truncation_note(budget, full_report_file)
+    cut = report_content.rfind("\n", 0, max(budget - len(note), 0)) + 1
+    return report_content[:cut] + note + extra
+
+
+def read_report_file(report_file: str, max_chars: int = GITHUB_SUMMARY_LIMIT) -> str:
+    """Reads and returns the content of the report.md file, capped at GitHub's summary limit."""
     if os.path.isfile(report_file):
         with open(report_file, "r", encoding="utf-8") as file:
-            return file.read()
+            return file.read(max_chars)
     return "No report file found."
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post Robot Framework results as a GitHub check run")
+    parser.add_argument("--engine", choices=ENGINES, default="robot",
+                        help="Result parser: 'robot' builds the full ExecutionResult model, "
+                             "'stream' reads output.xml incrementally without loading keywords, "
+                             "'triage' skips passing tests entirely and only details failures")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of worker processes used to parse shards (0 = one per CPU)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file caching per-shard summaries between runs")
+    parser.add_argument("--no-cache", action="store_true", help="Parse every shard without using the summary cache")
+    parser.add_argument("--rebuild-cache", action="store_true", help="Discard the summary cache before running")
+    parser.add_argument("--trace", nargs="?", const="1", default=None,
+                        help="Record per-phase timings; optionally write the JSON trace to this path "
+                             "(default: $ROBOT_RESULTS_TRACE)")
+    parser.add_argument("--trace-markdown", action="store_true",
+                        help="Append the timing summary to the report posted to the check run")
+    parser.add_argument("--cluster-failures", action="store_true",
+                        help="Add a section with one row per cluster of failures with the same normalized message, "
+                             "unless report.md is already clustered (display_test_results.py --cluster-failures)")
+    parser.add_argument("--similarity", type=float, default=None,
+                        help="With --cluster-failures, also merge clusters whose messages are this similar (0-1)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Always parse output.xml, even when a binary result index is next to it")
+    args = parser.parse_args(argv)
+    tracer = tracer_from_env(args.trace)
+
+    if args.no_cache:
+        run_robot_tests(engine=args.engine, jobs=args.jobs, tracer=tracer, trace_markdown=args.trace_markdown,
+                        cluster=args.cluster_failures, similarity=args.similarity, use_index=not args.no_index)
+    else:
+        with SummaryCache(args.cache, rebuild=args.rebuild_cache) as cache:
+            run_robot_tests(engine=args.engine, jobs=args.jobs, cache=cache,
+                            tracer=tracer, trace_markdown=args.trace_markdown,
+                            cluster=args.cluster_failures, similarity=args.similarity,
+                            use_index=not args.no_index)
+
+
 if __name__ == "__main__":
-    run_robot_tests()
+    main()
 
 
 # import os
@@ -0,0 +1,170 @@
+"""Robot Framework listener that keeps a GitHub check run updated while tests execute.
+
+Usage:
+    robot --pythonpath functions --listener check_listener.CheckRunListener:30:5:30 tests/
+
+The optional arguments are the update interval in seconds, the number of
+new failures that triggers an early update and how many seconds the end of
+the run waits for pending GitHub calls. GITHUB_TOKEN, GITHUB_REPOSITORY
+and GITHUB_SHA must be set; otherwise the listener does nothing.
+"""
+import os
+import time
+import threading
+from github_checks import ChecksClient, ChecksError, check_conclusion, check_title
+from markdown_report import markdown_cell
+
+DEFAULT_INTERVAL = 30.0
+DEFAULT_FAILURE_BATCH = 5
+DEFAULT_CLOSE_TIMEOUT = 30.0
+MAX_LISTED_FAILURES = 50
+
+
+class CheckRunListener:
+    """Listener v3 that opens an in_progress check run and PATCHes it as tests finish.
+
+    The Robot thread only updates counters under a lock. A background thread
+    creates the check run, then wakes up every `interval` seconds, or as soon
+    as `failure_batch` new failures have arrived, and pushes one coalesced
+    update, so test execution never waits on the network; results that
+    arrive before the run exists are simply included in its first update.
+    `close` stops the thread, waiting at most `close_timeout` seconds, and
+    completes the run with the same conclusion logic as check.post_github_check.
+    """
+
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, interval=DEFAULT_INTERVAL, failure_batch=DEFAULT_FAILURE_BATCH,
+                 close_timeout=DEFAULT_CLOSE_TIMEOUT):
+        self.interval = float(interval)
+        self.failure_batch = int(failure_batch)
+        self.close_timeout = float(close_timeout)
+        self.counts = {"total": 0, "passed": 0, "failed": 0, "skipped": 0}
+        self.failures = []
+        self.started = None
+        self.check_run_id = None
+        self.client = None
+        self.job_name = os.getenv("JOB_NAME") or os.getenv("GITHUB_JOB", "Unknown Job")
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._dirty = False
+        self._pending_failures = 0
+        self._thread = None
+
+    def start_suite(self, data, result):
+        if self.started is not None:
+            return
+        self.started = time.time()
+        token = os.getenv("GITHUB_TOKEN")
+        repository = os.getenv("GITHUB_REPOSITORY")
+        self.commit_sha = os.getenv("GITHUB_SHA")
+        if not all([token, repository, self.commit_sha]):
+            print("Warning: Missing GitHub environment variables; live check-run updates disabled")
+            return
+
+        self._thread = threading.Thread(target=self._run, args=(token, repository), name="check-run-updater",
+                                        daemon=True)
+        self._thread.start()
+
+    def end_test(self, data, result):
+        with self._lock:
+            self.counts["total"] += 1
+            if result.status == "PASS":
+                self.counts["passed"] += 1
+            elif result.status == "FAIL":
+                self.counts["failed"] += 1
+                self._pending_failures += 1
+                if len(self.failures) < MAX_LISTED_FAILURES:
+                    self.failures.append((result.longname, result.message))
+            elif result.status == "SKIP":
+                self.counts["skipped"] += 1
+            self._dirty = True
+            if self._pending_failures >= self.failure_batch:
+                self._wake.set()
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(self.close_timeout)
+        if self._thread.is_alive():
+            print(f"⚠️ GitHub did not respond within {self.close_timeout:g}s; check run left in progress")
+            return
+        if self.check_run_id is None:
+            if self.client is not None:
+                self.client.close()
+            return
+
+        minutes, seconds = divmod(time.time() - self.started, 60)
+        with self._lock:
+            payload = {
+                "status": "completed",
+                "conclusion": check_conclusion(self.counts["failed"]),
+                "output": self._output(check_title(self.job_name, minutes, seconds)),
+            }
+        try:
+            self.client.update_check_run(self.check_run_id, payload)
+            print("✅ GitHub check run completed")
+        except ChecksError as error:
+            print(f"❌ Failed to complete GitHub check run: {error}")
+        finally:
+            self.client.close()
+
+    def _open(self, token, repository):
+        self.client = ChecksClient(token, repository)
+        with self._lock:
+            self._dirty = False
+            self._pending_failures = 0
+            output = self._output(f"Test Results - {self.job_name} running")
+        try:
+            check_run = self.client.create_check_run({
+                "name": "Test Results",
+                "head_sha": self.commit_sha,
+                "status": "in_progress",
+                "output": output,
+            })
+        except ChecksError as error:
+            print(f"❌ Failed to open GitHub check run: {error}")
+            return False
+        self.check_run_id = check_run["id"]
+        return True
+
+    def _run(self, token, repository):
+        # The run is created here, even if close() has already been called, so short runs still get one.
+        if not self._open(token, repository):
+            return
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            with self._lock:
+                if not self._dirty:
+                    continue
+                self._dirty = False
+                self._pending_failures = 0
+                output = self._output(f"Test Results - {self.job_name} running")
+            try:
+                self.client.update_check_run(self.check_run_id, {"output": output})
+            except ChecksError as error:
+                print(f"⚠️ Failed to update GitHub check run: {error}")
+
+    def _output(self, title):
+        counts = self.counts
+        lines = [
+            "### Test Results Summary\n",
+            f"- 📊 **Total Tests:** {counts['total']}",
+            f"- ✅ **Passed:** {counts['passed']}",
+            f"- ❌ **Failed:** {counts['failed']}",
+        ]
+        if counts["skipped"]:
+            lines.append(f"- ⏭️ **Skipped:** {counts['skipped']}")
+        if self.failures:
+            lines.append("\n| Failed Test | Message |\n|-------------|---------|")
+            lines.extend(f"| {markdown_cell(name)} | {markdown_cell(message.splitlines()[0]) if message else ''} |"
+                         for name, message in self.failures)
+            if counts["failed"] > len(self.failures):
+                lines.append(f"\n_… {counts['failed'] - len(self.failures)} more failures._")
+        return {"title": title, "summary": "\n".join(lines)}
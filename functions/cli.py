@@ -0,0 +1,157 @@
+"""Single entry point for the result scripts: `python functions <command> [options]`.
+
+Every command imports only what it needs when it runs. `discover` and
+`summarize` never import Robot Framework or requests; `report`, `merge` and
+`post` hand their arguments to the existing scripts' own parsers.
+"""
+import os
+import sys
+import json
+import argparse
+import importlib
+
+DEFAULT_RESULTS_DIR = "./merged-results"
+SUMMARY_ENGINES = ("triage", "stream")  # the stdlib parsers; 'robot' is only available through report/post
+DELEGATED_COMMANDS = {
+    "report": ("display_test_results", "Write report.md from ./webapp_tests/robot-test-results (display_test_results.py)"),
+    "merge": ("merge_reports", "Merge robot-test-results-* shards with rebot (merge_reports.py)"),
+    "post": ("check", "Post merged results as a GitHub check run (check.py)"),
+}
+IMPORT_MODULES = ("cli", "stream_results", "result_index", "display_test_results", "merge_reports", "check")
+
+
+def output_files(paths):
+    """Expand directories into the output.xml files below them; files are kept as given."""
+    from check import find_output_files
+
+    files = []
+    for path in paths:
+        files.extend(sorted(find_output_files(path)) if os.path.isdir(path) else [path])
+    return [f for f in files if os.path.isfile(f)]
+
+
+def discover(args):
+    files = output_files(args.paths)
+    for output_file in files:
+        print(output_file)
+    if not files:
+        print(f"❌ Error: No output.xml files found in {', '.join(args.paths)}.", file=sys.stderr)
+    return 0 if files else 1
+
+
+def summarize_files(files, engine="triage", use_index=True):
+    """Count the latest attempt of every test across output files, without importing Robot.
+
+    Files are read oldest first; a test found in several files counts once
+    with its last status, as in the rerun-aware report.
+    """
+    from display_test_results import attempt_order
+    from rerun_merge import AttemptIndex, test_key
+    from stream_results import load_result
+
+    attempts = AttemptIndex()
+    failed = {}
+    for output_file in attempt_order(files):
+        result = load_result(output_file, engine, use_index)
+        for test in result.iter_tests():
+            key = test_key(test.longname)
+            for status in test.attempts:  # attempts rebot --merge folded into this one
+                attempts.add(key, status)
+            attempts.add(key, test.status)
+            if test.status == "FAIL":
+                failed[key] = {"name": test.longname, "message": test.message}
+        if hasattr(result, "close"):
+            result.close()
+
+    return {
+        "total": attempts.count(),
+        "passed": attempts.count("PASS"),
+        "failed": attempts.count("FAIL"),
+        "skipped": attempts.count("SKIP"),
+        "failed_tests": [test for key, test in failed.items() if attempts.latest[key] == "FAIL"],
+        "flaky": len(attempts.flaky),
+        "reruns": attempts.reruns,
+    }
+
+
+def summarize(args):
+    files = output_files(args.paths)
+    if not files:
+        print(f"❌ Error: No output.xml files found in {', '.join(args.paths)}.", file=sys.stderr)
+        return 1
+    summary = summarize_files(files, args.engine, not args.no_index)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    print(f"📊 Total: {summary['total']}  ✅ Passed: {summary['passed']}  ❌ Failed: {summary['failed']}  "
+          f"⏭️ Skipped: {summary['skipped']}")
+    if summary["reruns"]:
+        print(f"🔁 {summary['reruns']} rerun attempts, {summary['flaky']} flaky tests")
+    for test in summary["failed_tests"]:
+        message = test["message"].splitlines()[0] if test["message"] else ""
+        print(f"❌ {test['name']}: {message}")
+    return 0
+
+
+def imports(args):
+    """Measure the cold-start import cost of the entry-point modules, each in a fresh interpreter."""
+    from instrumentation import measure_import
+
+    rows = [measure_import(module, cwd=os.path.dirname(os.path.abspath(__file__))) for module in args.modules]
+    lines = ["### ⏱️ Import Times\n", "| Module | Import (ms) | Process (ms) | Heavy imports |",
+             "|--------|-------------|--------------|---------------|"]
+    for row in rows:
+        import_ms = row["import_ms"] if row["ok"] else "failed"
+        lines.append(f"| {row['module']} | {import_ms} | {row['process_ms']} | {', '.join(row['heavy']) or '-'} |")
+    markdown = "\n".join(lines) + "\n"
+    print(markdown)
+    if args.markdown:
+        with open(args.markdown, "a", encoding="utf-8") as f:
+            f.write(markdown + "\n")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "imports": rows}, f, indent=2)
+    return 0 if all(row["ok"] for row in rows) else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="functions", description="Robot Framework result tools")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    command = commands.add_parser("discover", help="List output.xml files")
+    command.add_argument("paths", nargs="*", default=[DEFAULT_RESULTS_DIR],
+                         help=f"Directories to search or files to check (default: {DEFAULT_RESULTS_DIR})")
+    command.set_defaults(handler=discover)
+
+    command = commands.add_parser("summarize", help="Print pass/fail counts without importing Robot")
+    command.add_argument("paths", nargs="*", default=[DEFAULT_RESULTS_DIR],
+                         help=f"output.xml files or directories to search (default: {DEFAULT_RESULTS_DIR})")
+    command.add_argument("--engine", choices=SUMMARY_ENGINES, default="triage", help="Stdlib result parser")
+    command.add_argument("--no-index", action="store_true", help="Ignore binary result indexes next to the files")
+    command.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    command.set_defaults(handler=summarize)
+
+    for name, (_, help_text) in DELEGATED_COMMANDS.items():
+        commands.add_parser(name, help=help_text, add_help=False)  # listed in --help; dispatched in main()
+
+    command = commands.add_parser("imports", help="Measure the import time of each entry point")
+    command.add_argument("modules", nargs="*", default=list(IMPORT_MODULES), help="Modules to measure")
+    command.add_argument("--markdown", default=None, help="Append the table to this file, e.g. $GITHUB_STEP_SUMMARY")
+    command.add_argument("--json", default=None, help="Write the measurements to this JSON file")
+    command.set_defaults(handler=imports)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in DELEGATED_COMMANDS:
+        # The scripts parse their own options, including --help, so everything after the command is theirs.
+        sys.argv[0] = f"functions {argv[0]}"
+        return importlib.import_module(DELEGATED_COMMANDS[argv[0]][0]).main(argv[1:])
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
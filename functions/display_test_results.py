@@ -1,14 +1,34 @@
-from robot.api import ExecutionResult, ResultVisitor
 import sys
 import os
 import glob
-
-
-class MyResultVisitor(ResultVisitor):
-    def __init__(self, markdown_file='./webapp_tests/robot-test-results/report.md'):
-        self.failed_tests = []
-        self.passed_tests = []
+import argparse
+from duration_history import DEFAULT_HISTORY_PATH, DEFAULT_KEEP_RUNS, DurationHistory, history_markdown
+from failure_clusters import cluster_failures, store_failures
+from markdown_report import DEFAULT_MAX_CHARS, full_report_path, write_markdown_report
+from result_index import IndexedTest, top_suite
+from result_store import StoredTest, TestResultStore
+from rerun_merge import flaky_markdown
+from stream_results import ENGINES, TestRecord, earlier_statuses, load_result, merged_message
+
+# robot.result body item types as failed_keyword_chain names them; None means the keyword's full name.
+# RETURN, BREAK, VAR and other statements cannot contain a failing keyword and are skipped, as there.
+ROBOT_BODY_NAMES = {
+    "KEYWORD": None, "SETUP": None, "TEARDOWN": None,
+    "FOR": "FOR", "WHILE": "WHILE", "ITERATION": "ITER", "GROUP": "GROUP",
+    "IF/ELSE ROOT": "IF", "IF": "IF", "ELSE IF": "ELSE IF", "ELSE": "ELSE",
+    "TRY/EXCEPT ROOT": "TRY", "TRY": "TRY", "EXCEPT": "EXCEPT", "FINALLY": "FINALLY",
+}
+
+
+class MyResultVisitor:
+    """Collects test results from any result engine; needs no Robot import of its own."""
+
+    def __init__(self, markdown_file='./webapp_tests/robot-test-results/report.md', dedupe=False):
+        self.store = TestResultStore(dedupe=dedupe)
+        self.suite_times = []
         self.markdown_file = markdown_file
+        self._file_names = {}
+        self._suites_with_tests = set()
 
         self._ensure_directory_exists()
         
@@ -17,46 +37,165 @@ class MyResultVisitor(ResultVisitor):
         if directory and not os.path.exists(directory):
             os.makedirs(directory)
 
+    @property
+    def passed_tests(self):
+        """Passed tests as dicts; kept for callers written against the old list attributes."""
+        return [test.as_dict() for test in self.store.iter_tests("PASS")]
+
+    @property
+    def failed_tests(self):
+        """Failed tests as dicts; kept for callers written against the old list attributes."""
+        return [test.as_dict() for test in self.store.iter_tests("FAIL")]
+
+    def _file_name(self, source):
+        source = str(source) if source else None
+        file_name = self._file_names.get(source)
+        if file_name is None:
+            file_name = self._file_names[source] = os.path.basename(source) if source else "Unknown File"
+        return file_name
+
+    def start_suite(self, suite):
+        pass
+
     def visit_test(self, test):
-        file_name = os.path.basename(test.source) if test.source else "Unknown File"
-
-        test_info = {
-            "name": test.name,
-            "file": file_name,
-            "status": test.status,
-            "message": test.message if test.status == 'FAIL' else "N/A",
-        }
-
-        if test.status == 'FAIL':
-            self.failed_tests.append(test_info)
-        elif test.status == 'PASS':
-            self.passed_tests.append(test_info)
-
-    def write_report(self):
-        total_tests = len(self.passed_tests) + len(self.failed_tests)
-        passed_count = len(self.passed_tests)
-        failed_count = len(self.failed_tests)
-
-        with open(self.markdown_file, "w") as f:
-            f.write("### Test Results Summary\n\n")
-            f.write(f"- 📊 **Total Tests:** {total_tests}\n")
-            f.write(f"- ✅ **Passed:** {passed_count}\n")
-            f.write(f"- ❌ **Failed:** {failed_count}\n\n")
-
-            if total_tests > 0:
-                f.write("| Test Name | File | Status | Message |\n")
-                f.write("|-----------|------|--------|---------|\n")
-                
-                for test in self.passed_tests:
-                    f.write(f"| {test['name']} | {test['file']} | ✅ PASS | |\n")
-
-                for test in self.failed_tests:
-                    f.write(f"| {test['name']} | {test['file']} | ❌ FAIL | {test['message']} |\n")
+        suite = test_suite_name(test)
+        self._suites_with_tests.add(suite)
+        self.store.add(
+            name=test.name,
+            file=self._file_name(test.source),
+            status=test.status,
+            message=merged_message(test.message),
+            suite=suite,
+            lineno=test.lineno,
+            elapsed=elapsed_seconds(test),
+            source=str(test.source) if test.source else "",
+            keywords=failed_keywords(test) if test.status == "FAIL" else None,
+            tags=getattr(test, "tags", None),
+            attempts=earlier_attempts(test),
+        )
+
+    def end_suite(self, suite):
+        # Only suites that directly contain tests; parents would just repeat their children's time.
+        if suite.longname in self._suites_with_tests:
+            self.suite_times.append((elapsed_seconds(suite), suite.longname))
+
+    def record_history(self, history, commit_sha=None, keep_runs=DEFAULT_KEEP_RUNS):
+        """Append this run's per-test durations to a DurationHistory and return its Markdown section."""
+        run_id = history.record_run(
+            ((test.longname, test.elapsed, test.status) for test in self.store.iter_tests()), commit_sha)
+        history.compact(keep_runs)
+        return history_markdown(history.find_slowdowns(run_id), history.top_consumers(run_id))
+
+    def flaky_section(self):
+        """Markdown section listing tests whose attempts flipped between PASS and FAIL, or None."""
+        if not self.store.flaky:
+            return None
+        flaky = sorted((StoredTest(self.store, index) for index in self.store.flaky), key=lambda test: test.longname)
+        return flaky_markdown([test.as_dict() for test in flaky])
+
+    def write_report(self, max_chars=DEFAULT_MAX_CHARS, full_report_file=None, sections=(),
+                     cluster=False, similarity=None):
+        """Write the Markdown summary, bounded to max_chars, plus an untruncated copy next to it.
+
+        With cluster=True, failed tests are grouped by normalized message and
+        listed once per cluster; `similarity` also merges near-identical ones.
+        """
+        if full_report_file is None:
+            full_report_file = full_report_path(self.markdown_file)
+        clusters = cluster_failures(store_failures(self.store), similarity) if cluster else None
+        truncated = write_markdown_report(self.store, self.markdown_file, max_chars, full_report_file,
+                                          sections, clusters)
 
         print(f"📄 Report generated: {self.markdown_file}")
+        if truncated:
+            print(f"✂️ Report truncated to {max_chars} characters; full report: {full_report_file}")
+
+
+def test_suite_name(test):
+    """Return the full name of a test's suite for both robot.result and streamed records."""
+    parent = getattr(test, "parent", None)
+    if parent is not None:
+        return parent.longname
+    return getattr(test, "suite", "")
+
+
+def earlier_attempts(test):
+    """Statuses of the attempts rebot --merge folded into a test, oldest first, for any engine's records."""
+    if isinstance(test, (TestRecord, IndexedTest)):
+        return test.attempts
+    return earlier_statuses(test.message)
+
+
+def failed_keywords(test):
+    """Return the chain of failing keyword names inside a failed test.
+
+    Triage and indexed records carry the chain already; streamed records
+    never parse keywords and have none. For robot.result tests the body is
+    walked and named like stream_results.failed_keyword_chain: keywords by
+    full name, control structures by their XML tag.
+    """
+    if isinstance(test, (TestRecord, IndexedTest)):
+        return test.keywords
+    chain = []
+    item = test
+    while True:
+        item = next((child for child in body_items(item) if child.type in ROBOT_BODY_NAMES
+                     and child.status == "FAIL"), None)
+        if item is None:
+            return chain
+        name = ROBOT_BODY_NAMES[item.type]
+        chain.append(name or getattr(item, "full_name", None) or item.name)
+
+
+def body_items(item):
+    """Setup, body and teardown of a robot.result test, keyword or control structure, in XML order."""
+    setup = getattr(item, "setup", None)
+    teardown = getattr(item, "teardown", None)
+    return [*([setup] if setup else []), *getattr(item, "body", ()), *([teardown] if teardown else [])]
+
+
+def attempt_order(xml_files):
+    """Sort output files by their top suite's start time so later reruns are visited last."""
+    def start_time(xml_file):
+        try:
+            suite = top_suite(xml_file)
+        except Exception:
+            suite = None
+        return (suite.starttime or "") if suite else ""
+    return sorted(xml_files, key=start_time)
+
+
+def elapsed_seconds(item):
+    """Return a test's or suite's elapsed time in seconds for both robot.result and streamed records."""
+    if hasattr(item, "elapsed"):
+        return item.elapsed
+    elapsed_ms = getattr(item, "elapsedtime", None)
+    return elapsed_ms / 1000 if elapsed_ms else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a Markdown summary of Robot Framework results")
+    parser.add_argument("--engine", choices=ENGINES, default="robot",
+                        help="Result parser: 'robot' (full model), 'stream' (incremental, bounded memory) "
+                             "or 'triage' (skips passing tests' keywords, details failures only)")
+    parser.add_argument("--max-report-chars", type=int, default=DEFAULT_MAX_CHARS,
+                        help="Character budget for report.md; the full report is written to report-full.md")
+    parser.add_argument("--history", nargs="?", const=DEFAULT_HISTORY_PATH, default=None,
+                        help=f"Record test durations in a SQLite history (default path: {DEFAULT_HISTORY_PATH}) "
+                             "and report slowdowns against recent runs")
+    parser.add_argument("--commit", default=os.getenv("GITHUB_SHA"),
+                        help="Commit the run is recorded under (default: $GITHUB_SHA)")
+    parser.add_argument("--keep-runs", type=int, default=DEFAULT_KEEP_RUNS,
+                        help="Number of most recent runs kept in the history")
+    parser.add_argument("--cluster-failures", action="store_true",
+                        help="Group failed tests by normalized message, one report row per cluster")
+    parser.add_argument("--similarity", type=float, default=None,
+                        help="With --cluster-failures, also merge clusters whose messages are this similar (0-1)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Always parse output.xml, even when a binary result index is next to it")
+    # The workflow still passes legacy positional arguments; they are ignored as before.
+    args, _ = parser.parse_known_args(argv)
 
-
-if __name__ == '__main__':
     # Set base directory where output.xml files are expected
     base_dir = "./webapp_tests/robot-test-results"
     markdown_file = os.path.join(base_dir, "report.md")
@@ -68,14 +207,30 @@ if __name__ == '__main__':
         print(f"❌ Error: No 'output.xml' files found in {base_dir}.")
         sys.exit(1)
 
-    visitor = MyResultVisitor(markdown_file=markdown_file)
+    # Reruns of a test in several outputs count once, with the latest attempt's result.
+    visitor = MyResultVisitor(markdown_file=markdown_file, dedupe=True)
 
-    for xml_file in xml_files:
+    for xml_file in attempt_order(xml_files):
         print(f"📂 Processing: {xml_file}")
-        result = ExecutionResult(xml_file)
+        result = load_result(xml_file, args.engine, use_index=not args.no_index)
         result.visit(visitor)
 
-    visitor.write_report()
+    sections = []
+    flaky = visitor.flaky_section()
+    if flaky:
+        sections.append(flaky)
+        print(f"🔁 {len(visitor.store.flaky)} flaky tests across {visitor.store.reruns} reruns")
+    if args.history:
+        with DurationHistory(args.history) as history:
+            sections.append(visitor.record_history(history, args.commit, args.keep_runs))
+        print(f"🗃️ Durations recorded in {args.history}")
+
+    visitor.write_report(max_chars=args.max_report_chars, sections=sections,
+                         cluster=args.cluster_failures, similarity=args.similarity)
+
+
+if __name__ == '__main__':
+    main()
 
 
 # from robot.api import ExecutionResult, ResultVisitor
@@ -0,0 +1,170 @@
+import os
+import math
+import time
+import sqlite3
+from markdown_report import markdown_cell
+from result_store import STATUS_CODES
+
+DEFAULT_HISTORY_PATH = ".robot-duration-history.sqlite"
+DEFAULT_KEEP_RUNS = 100
+DEFAULT_BASELINE_RUNS = 20
+DEFAULT_TOP = 10
+
+
+class DurationHistory:
+    """Append-only store of per-test durations across runs, backed by SQLite.
+
+    Test names are interned into a `tests` table and every run gets a row in
+    `runs` keyed by commit. Durations live in a WITHOUT ROWID table clustered
+    on (test_id, run_id) with a secondary index on run_id, so both "this run"
+    and "this test's history" queries are index range scans and never load
+    the whole history. Old runs are dropped by `compact`, which only
+    rewrites the file once enough of it is free space.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS tests (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY,
+                commit_sha TEXT,
+                recorded_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS runs_commit ON runs (commit_sha);
+            CREATE TABLE IF NOT EXISTS durations (
+                test_id INTEGER NOT NULL,
+                run_id INTEGER NOT NULL,
+                elapsed REAL NOT NULL,
+                status INTEGER NOT NULL,
+                PRIMARY KEY (test_id, run_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS durations_run ON durations (run_id);
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def _test_ids(self, names):
+        """Return {name: id}, inserting names that have not been seen before."""
+        names = list(dict.fromkeys(names))
+        self.db.executemany("INSERT OR IGNORE INTO tests (name) VALUES (?)", ((n,) for n in names))
+        ids = {}
+        for start in range(0, len(names), 500):  # stay under SQLite's bound-parameter limit
+            chunk = names[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(self.db.execute(f"SELECT name, id FROM tests WHERE name IN ({placeholders})", chunk))
+        return ids
+
+    def record_run(self, tests, commit_sha=None):
+        """Append one run from an iterable of (test name, elapsed seconds, status); return the run id."""
+        tests = list(tests)
+        with self.db:
+            run_id = self.db.execute("INSERT INTO runs (commit_sha, recorded_at) VALUES (?, ?)",
+                                     (commit_sha, time.time())).lastrowid
+            ids = self._test_ids(name for name, _, _ in tests)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO durations (test_id, run_id, elapsed, status) VALUES (?, ?, ?, ?)",
+                ((ids[name], run_id, elapsed, STATUS_CODES.get(status, STATUS_CODES["NOT RUN"]))
+                 for name, elapsed, status in tests))
+        return run_id
+
+    def compact(self, keep_runs=DEFAULT_KEEP_RUNS):
+        """Drop all but the newest keep_runs runs and tests that no longer have durations."""
+        with self.db:
+            stale = [row[0] for row in self.db.execute(
+                "SELECT id FROM runs ORDER BY id DESC LIMIT -1 OFFSET ?", (keep_runs,))]
+            self.db.executemany("DELETE FROM durations WHERE run_id = ?", ((run_id,) for run_id in stale))
+            self.db.executemany("DELETE FROM runs WHERE id = ?", ((run_id,) for run_id in stale))
+            if stale:
+                self.db.execute("DELETE FROM tests WHERE id NOT IN (SELECT DISTINCT test_id FROM durations)")
+        # Deleted pages are reused by later inserts; only rewrite the file once a quarter of it is free.
+        free_pages = self.db.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages * 4 > self.db.execute("PRAGMA page_count").fetchone()[0]:
+            self.db.execute("VACUUM")
+        return len(stale)
+
+    def _baseline_runs(self, run_id, baseline_runs):
+        return [row[0] for row in self.db.execute(
+            "SELECT id FROM runs WHERE id < ? ORDER BY id DESC LIMIT ?", (run_id, baseline_runs))]
+
+    def find_slowdowns(self, run_id, baseline_runs=DEFAULT_BASELINE_RUNS, min_samples=5,
+                       z_score=3.0, min_ratio=1.5, min_seconds=0.5, limit=DEFAULT_TOP):
+        """Return tests in run_id that are significantly slower than their recent history.
+
+        A test is flagged when its duration is more than `z_score` standard
+        deviations above its mean over the previous `baseline_runs` runs, at
+        least `min_ratio` times that mean and at least `min_seconds` slower.
+        Only passing baseline samples count, so earlier failures that aborted
+        early do not drag the mean down. Sorted by time lost, worst first.
+        """
+        runs = self._baseline_runs(run_id, baseline_runs)
+        if not runs:
+            return []
+        placeholders = ",".join("?" * len(runs))
+        rows = self.db.execute(f"""
+            SELECT t.name, cur.elapsed, base.n, base.mean, base.mean_sq
+            FROM durations AS cur
+            JOIN (
+                SELECT test_id, COUNT(*) AS n, AVG(elapsed) AS mean, AVG(elapsed * elapsed) AS mean_sq
+                FROM durations
+                WHERE run_id IN ({placeholders}) AND status = 0
+                GROUP BY test_id
+            ) AS base ON base.test_id = cur.test_id
+            JOIN tests AS t ON t.id = cur.test_id
+            WHERE cur.run_id = ? AND base.n >= ?
+        """, (*runs, run_id, min_samples))
+
+        slowdowns = []
+        for name, elapsed, samples, mean, mean_sq in rows:
+            stddev = math.sqrt(max(mean_sq - mean * mean, 0.0))
+            if (elapsed - mean >= min_seconds and elapsed >= mean * min_ratio
+                    and elapsed > mean + z_score * stddev):
+                slowdowns.append({"name": name, "elapsed": elapsed, "mean": mean,
+                                  "stddev": stddev, "samples": samples})
+        slowdowns.sort(key=lambda row: row["elapsed"] - row["mean"], reverse=True)
+        return slowdowns[:limit]
+
+    def top_consumers(self, run_id, window_runs=DEFAULT_BASELINE_RUNS, limit=DEFAULT_TOP):
+        """Return the tests with the most total time over the last window_runs runs up to run_id."""
+        runs = [run_id] + self._baseline_runs(run_id, window_runs - 1)
+        placeholders = ",".join("?" * len(runs))
+        rows = self.db.execute(f"""
+            SELECT t.name, SUM(d.elapsed) AS total, COUNT(*) AS n
+            FROM durations AS d JOIN tests AS t ON t.id = d.test_id
+            WHERE d.run_id IN ({placeholders})
+            GROUP BY d.test_id
+            ORDER BY total DESC
+            LIMIT ?
+        """, (*runs, limit))
+        return [{"name": name, "total": total, "runs": n} for name, total, n in rows]
+
+
+def history_markdown(slowdowns, consumers):
+    """Render slowdowns and top time consumers as a Markdown section."""
+    lines = ["### 🐢 Duration History\n"]
+    if slowdowns:
+        lines.append("| Slower Test | Now | Usual | Samples |\n|-------------|-----|-------|---------|")
+        lines.extend(f"| {markdown_cell(row['name'])} | {row['elapsed']:.2f}s | "
+                     f"{row['mean']:.2f}s ± {row['stddev']:.2f}s | {row['samples']} |" for row in slowdowns)
+    else:
+        lines.append("No significant slowdowns against recent runs.")
+    if consumers:
+        lines.append("\n| Top Time Consumer | Total | Runs |\n|-------------------|-------|------|")
+        lines.extend(f"| {markdown_cell(row['name'])} | {row['total']:.2f}s | {row['runs']} |" for row in consumers)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,149 @@
+import re
+import zlib
+import random
+from markdown_report import CLUSTER_HEADER, CLUSTER_HEADING, cluster_row
+
+DEFAULT_SAMPLES = 3
+MAX_SIGNATURE_CHARS = 500
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+_MERSENNE_PRIME = (1 << 61) - 1
+
+# Applied in order: the broad patterns first so their digits are not replaced piecemeal.
+_NORMALIZERS = [
+    (re.compile(r"\b[a-z][a-z0-9+.-]*://\S+", re.I), "<url>"),
+    (re.compile(r"(?:\b[a-z]:)?(?:[\\/][\w.@~-]+){2,}[\\/]?", re.I), "<path>"),
+    (re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.I), "<id>"),
+    (re.compile(r"\b(?:0x[0-9a-f]+|(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{6,})\b", re.I), "<id>"),
+    (re.compile(r"\d+(?:\.\d+)?"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+_permutation_rng = random.Random(0)
+_PERMUTATIONS = [(_permutation_rng.randrange(1, _MERSENNE_PRIME), _permutation_rng.randrange(_MERSENNE_PRIME))
+                 for _ in range(MINHASH_BANDS * MINHASH_ROWS)]
+
+
+class FailureCluster:
+    """Failed tests that share a normalized failure message."""
+
+    __slots__ = ("signature", "message", "count", "samples")
+
+    def __init__(self, signature, message):
+        self.signature = signature
+        self.message = message
+        self.count = 0
+        self.samples = []
+
+    def add(self, name, file, max_samples=DEFAULT_SAMPLES):
+        self.count += 1
+        if len(self.samples) < max_samples:
+            self.samples.append((name, file))
+
+    def absorb(self, other, max_samples=DEFAULT_SAMPLES):
+        self.count += other.count
+        self.samples.extend(other.samples[:max_samples - len(self.samples)])
+
+    def to_dict(self):
+        return {"signature": self.signature, "message": self.message, "count": self.count,
+                "samples": [list(sample) for sample in self.samples]}
+
+
+def normalize_message(message):
+    """Reduce a failure message to a signature by masking URLs, paths, ids and numbers."""
+    signature = (message or "").strip()[:MAX_SIGNATURE_CHARS]
+    for pattern, replacement in _NORMALIZERS:
+        signature = pattern.sub(replacement, signature)
+    return signature.strip()
+
+
+def cluster_failures(failures, similarity=None, max_samples=DEFAULT_SAMPLES):
+    """Group (name, file, message) failures into FailureClusters, largest first.
+
+    Failures are bucketed by the hash of their normalized message in one
+    pass. With `similarity` (0-1), buckets whose signatures have at least that
+    word-level Jaccard similarity are merged as well; candidates come from
+    MinHash banding, so that pass also stays near-linear in the number of
+    buckets.
+    """
+    buckets = {}
+    by_message = {}  # identical raw messages skip normalization entirely
+    for name, file, message in failures:
+        cluster = by_message.get(message)
+        if cluster is None:
+            signature = normalize_message(message)
+            cluster = buckets.get(signature)
+            if cluster is None:
+                cluster = buckets[signature] = FailureCluster(signature, message or "")
+            by_message[message] = cluster
+        cluster.add(name, file, max_samples)
+
+    clusters = list(buckets.values())
+    if similarity is not None and len(clusters) > 1:
+        clusters = merge_similar(clusters, similarity, max_samples)
+    clusters.sort(key=lambda cluster: cluster.count, reverse=True)
+    return clusters
+
+
+def merge_similar(clusters, similarity, max_samples=DEFAULT_SAMPLES):
+    """Merge clusters whose signatures are near-duplicates; return the surviving clusters."""
+    tokens = [set(cluster.signature.split()) for cluster in clusters]
+    parent = list(range(len(clusters)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    band_buckets = {}
+    for index, words in enumerate(tokens):
+        for band_key in minhash_bands(words):
+            representative = band_buckets.setdefault(band_key, index)
+            if representative == index:
+                continue
+            left, right = find(representative), find(index)
+            if left != right and jaccard(tokens[representative], words) >= similarity:
+                parent[right] = left
+
+    merged = {}
+    for index, cluster in enumerate(clusters):
+        root = find(index)
+        if root not in merged:
+            merged[root] = cluster
+        else:
+            merged[root].absorb(cluster, max_samples)
+    return list(merged.values())
+
+
+def minhash_bands(words):
+    """Yield one hashable key per MinHash band for a set of words."""
+    hashes = [zlib.crc32(word.encode("utf-8")) for word in words] or [0]
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+    for band in range(MINHASH_BANDS):
+        yield band, tuple(signature[band * MINHASH_ROWS:(band + 1) * MINHASH_ROWS])
+
+
+def jaccard(left, right):
+    if not left and not right:
+        return 1.0
+    return len(left & right) / len(left | right)
+
+
+def store_failures(store):
+    """(name, file, message) for every failed test in a TestResultStore."""
+    return ((test.name, test.file, test.message) for test in store.iter_tests("FAIL"))
+
+
+def record_failures(failed_tests):
+    """(name, file, message) for failed test records as produced by StoredTest.to_record()."""
+    return ((test.get("name", ""), test.get("file", ""), test.get("message", "")) for test in failed_tests)
+
+
+def clusters_markdown(clusters, max_rows=50):
+    """Render failure clusters as a Markdown section with one row per cluster."""
+    lines = [CLUSTER_HEADING, CLUSTER_HEADER.rstrip("\n")]
+    lines.extend(cluster_row(cluster).rstrip("\n") for cluster in clusters[:max_rows])
+    if len(clusters) > max_rows:
+        lines.append(f"\n_… {len(clusters) - max_rows} more failure clusters not shown._")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,204 @@
+import os
+import time
+import uuid
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlencode
+
+DEFAULT_API_URL = "https://api.github.com"
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+MAX_ANNOTATIONS_PER_REQUEST = 50  # GitHub rejects larger batches
+MAX_ANNOTATION_MESSAGE_CHARS = 64 * 1024
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ChecksError(Exception):
+    """Raised when the GitHub Checks API keeps failing after all retries."""
+
+    def __init__(self, message, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+def check_conclusion(failed_tests):
+    """Return the check-run conclusion for a number of failed tests."""
+    return "success" if failed_tests == 0 else "failure"
+
+
+def check_title(job_name, minutes, seconds):
+    """Return the check-run output title for a finished job."""
+    return f"Test Results - {job_name} executed in {int(minutes)}m {int(seconds)}s"
+
+
+class ChecksClient:
+    """Small client for the GitHub Checks API.
+
+    Uses one pooled requests.Session for every call, applies connect/read
+    timeouts and retries transient failures (connection errors, 5xx, 429 and
+    rate-limited 403s) with exponential backoff. When GitHub says how long to
+    wait, through Retry-After or X-RateLimit-Reset, that wait is used instead.
+    `api_url` can point at a local stub server for testing.
+    """
+
+    def __init__(self, token, repository, api_url=None, timeout=DEFAULT_TIMEOUT,
+                 max_retries=5, backoff=1.0, max_delay=60.0, session=None):
+        self.repository = repository
+        self.api_url = (api_url or os.getenv("GITHUB_API_URL") or DEFAULT_API_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_delay = max_delay
+        # requests is imported here rather than at module load, so scripts that exit
+        # before posting anything do not pay for it.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = session or requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.session.headers.update({
+            "Accept": "application/vnd.github.v3+json",
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/json",
+        })
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def create_check_run(self, payload):
+        """Create a check run and return the decoded response (including its `id`).
+
+        Creating is not idempotent: a POST that timed out or got a 5xx may
+        still have created the run. The run is therefore tagged with an
+        `external_id`, and before each retry the commit's check runs are
+        searched for it, so a retry never creates a second run.
+        """
+        payload = dict(payload, external_id=payload.get("external_id") or uuid.uuid4().hex)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                existing = self.find_check_run(payload["head_sha"], payload["name"], payload["external_id"])
+                if existing is not None:
+                    return existing
+            try:
+                return self.request("POST", f"/repos/{self.repository}/check-runs", payload, retries=0).json()
+            except ChecksError as error:
+                response = error.response
+                if attempt == self.max_retries or (response is not None and not self._is_retryable(response)):
+                    raise
+                if response is None:
+                    self._sleep(self._backoff_delay(attempt), "request failed")
+                else:
+                    self._sleep(self.retry_delay(response, attempt), f"HTTP {response.status_code}")
+
+    def find_check_run(self, head_sha, name, external_id):
+        """Return the check run on head_sha with the given name and external_id, or None."""
+        query = urlencode({"check_name": name, "filter": "all", "per_page": 100})
+        response = self.request("GET", f"/repos/{self.repository}/commits/{quote(head_sha)}/check-runs?{query}")
+        return next((run for run in response.json().get("check_runs", []) if run.get("external_id") == external_id),
+                    None)
+
+    def update_check_run(self, check_run_id, payload):
+        """PATCH an existing check run and return the decoded response."""
+        return self.request("PATCH", f"/repos/{self.repository}/check-runs/{check_run_id}", payload).json()
+
+    def add_annotations(self, check_run_id, output, annotations):
+        """Attach annotations in batches of at most 50, repeating output's title and summary as GitHub requires."""
+        annotations = list(annotations)
+        for start in range(0, len(annotations), MAX_ANNOTATIONS_PER_REQUEST):
+            batch = annotations[start:start + MAX_ANNOTATIONS_PER_REQUEST]
+            self.update_check_run(check_run_id, {"output": dict(output, annotations=batch)})
+        return len(annotations)
+
+    def request(self, method, path, payload=None, retries=None):
+        """Send a request, retrying transient failures up to `retries` times; raise ChecksError if they persist."""
+        import requests
+
+        url = f"{self.api_url}{path}"
+        retries = self.max_retries if retries is None else retries
+        response = None
+        for attempt in range(retries + 1):
+            try:
+                response = self.session.request(method, url, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                if attempt == retries:
+                    raise ChecksError(f"{method} {url} failed: {error}") from error
+                self._sleep(self._backoff_delay(attempt), f"{type(error).__name__}")
+                continue
+
+            if response.status_code < 400:
+                return response
+            if not self._is_retryable(response) or attempt == retries:
+                break
+            self._sleep(self.retry_delay(response, attempt), f"HTTP {response.status_code}")
+
+        raise ChecksError(f"{method} {url} failed: {response.status_code} - {response.text}", response)
+
+    def _is_retryable(self, response):
+        if response.status_code in RETRY_STATUSES:
+            return True
+        return response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0"
+
+    def retry_delay(self, response, attempt):
+        """Seconds to wait before retrying, preferring the server's Retry-After/X-RateLimit-Reset hints."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                try:
+                    wait = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                    return min(max(wait, 0.0), self.max_delay)
+                except (TypeError, ValueError):
+                    pass
+
+        reset = response.headers.get("X-RateLimit-Reset")
+        if reset and response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                return min(max(float(reset) - time.time(), 0.0), self.max_delay)
+            except ValueError:
+                pass
+
+        return self._backoff_delay(attempt)
+
+    def _backoff_delay(self, attempt):
+        return min(self.backoff * (2 ** attempt), self.max_delay)
+
+    def _sleep(self, delay, reason):
+        print(f"⏳ GitHub API {reason}; retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def annotation_path(source, workspace=None):
+    """Return a repository-relative path for an annotation, as GitHub expects."""
+    if not source:
+        return None
+    workspace = os.path.abspath(workspace or os.getenv("GITHUB_WORKSPACE") or os.getcwd())
+    source = os.path.abspath(source)
+    if source.startswith(workspace + os.sep):
+        return os.path.relpath(source, workspace).replace(os.sep, "/")
+    return os.path.basename(source)
+
+
+def failure_annotations(failed_tests, workspace=None):
+    """Yield one failure annotation per failed test record that has a source file."""
+    for test in failed_tests:
+        path = annotation_path(test.get("source"), workspace)
+        if not path:
+            continue
+        line = test.get("lineno") or 1
+        annotation = {
+            "path": path,
+            "start_line": line,
+            "end_line": line,
+            "annotation_level": "failure",
+            "title": test.get("name", "")[:255],
+            "message": (test.get("message") or "Test failed")[:MAX_ANNOTATION_MESSAGE_CHARS],
+        }
+        if test.get("keywords"):
+            annotation["raw_details"] = " › ".join(test["keywords"])[:MAX_ANNOTATION_MESSAGE_CHARS]
+        yield annotation
@@ -0,0 +1,301 @@
+import os
+import re
+import sys
+import json
+import html
+import argparse
+from display_test_results import MyResultVisitor, attempt_order
+from stream_results import ENGINES, load_result
+
+DEFAULT_PAGE_SIZE = 200  # tests per data chunk
+SUITES_PER_PAGE = 100
+MAX_INDEXED_MESSAGE_CHARS = 500
+MIN_TERM_CHARS = 2  # search shards are keyed by a term's first two characters
+STATUS_ORDER = {"FAIL": 0, "SKIP": 1, "NOT RUN": 2, "PASS": 3}
+_TOKEN_RE = re.compile(r"\w+")
+_CHUNK_FILE_RE = re.compile(r"(tests-\d+|suites-\d+|search-[0-9a-f]+)\.js")  # every file write_chunk creates
+
+
+def tokens(test):
+    """Lower-case search terms for a test's name, tags and (truncated) message."""
+    text = " ".join([test.name, *test.tags, test.message[:MAX_INDEXED_MESSAGE_CHARS]])
+    return {token for token in _TOKEN_RE.findall(text.lower()) if len(token) >= MIN_TERM_CHARS}
+
+
+def shard_name(token):
+    """File name of the search shard holding a term, safe for any characters it starts with."""
+    return "search-" + token[:MIN_TERM_CHARS].encode("utf-8").hex()
+
+
+def order_suites(store):
+    """Group test rows by suite: suites with failures first, each suite's failures first."""
+    suites = {}
+    for test in store.iter_tests():
+        suites.setdefault(test.suite, []).append(test)
+    for tests in suites.values():
+        tests.sort(key=lambda test: STATUS_ORDER[test.status])  # stable, keeps file order per status
+    return sorted(suites.items(), key=lambda item: (
+        -sum(test.status == "FAIL" for test in item[1]), -sum(test.status == "SKIP" for test in item[1])))
+
+
+def delta_encode(ids):
+    """Store ascending posting ids as gaps, which keeps common terms' lists short in JSON."""
+    return [ids[0]] + [current - previous for previous, current in zip(ids, ids[1:])]
+
+
+def test_row(test):
+    return [test.name, test.status, round(test.elapsed, 3), test.message, test.tags, test.keywords,
+            test.file, test.lineno]
+
+
+def write_viewer(store, output_dir, title="Robot Framework Results", page_size=DEFAULT_PAGE_SIZE):
+    """Write a static results viewer for a TestResultStore into output_dir and return its index.html.
+
+    index.html embeds only the run totals; everything else is split into
+    data chunks that the page loads on demand: pages of suites (suites with
+    failures first), pages of at most `page_size` tests per suite (failures
+    first) and an inverted index of name, tag and message terms sharded by
+    each term's first two characters, with delta-encoded posting lists. A
+    test's id is its chunk number times `page_size` plus its row, so search
+    hits locate their chunk directly.
+    Chunks are JSON wrapped in a loader call, so the viewer also works when
+    opened from disk.
+    """
+    data_dir = os.path.join(output_dir, "data")
+    clear_data_dir(data_dir)
+
+    suites, postings = [], {}
+    chunk = 0
+    for suite_id, (suite, tests) in enumerate(order_suites(store)):
+        counts = dict.fromkeys(STATUS_ORDER, 0)
+        chunks = []
+        for start in range(0, len(tests), page_size):
+            rows = tests[start:start + page_size]
+            write_chunk(data_dir, f"tests-{chunk}", {"suite": suite_id, "rows": [test_row(test) for test in rows]})
+            for row, test in enumerate(rows):
+                counts[test.status] += 1
+                test_id = chunk * page_size + row
+                for token in tokens(test):
+                    postings.setdefault(shard_name(token), {}).setdefault(token, []).append(test_id)
+            chunks.append(chunk)
+            chunk += 1
+        suites.append({"id": suite_id, "name": suite, "file": tests[0].file, "counts": counts,
+                       "elapsed": round(sum(test.elapsed for test in tests), 3), "chunks": chunks})
+
+    for page, start in enumerate(range(0, len(suites), SUITES_PER_PAGE)):
+        write_chunk(data_dir, f"suites-{page}", suites[start:start + SUITES_PER_PAGE])
+    for name, shard in postings.items():
+        write_chunk(data_dir, name, {token: delta_encode(ids) for token, ids in shard.items()})
+
+    summary = {
+        "title": title,
+        "counts": {status: store.count(status) for status in STATUS_ORDER},
+        "total": store.count(),
+        "suites": len(suites),
+        "suitePages": (len(suites) + SUITES_PER_PAGE - 1) // SUITES_PER_PAGE,
+        "pageSize": page_size,
+        "minTermChars": MIN_TERM_CHARS,
+    }
+    index_file = os.path.join(output_dir, "index.html")
+    with open(index_file, "w", encoding="utf-8") as f:
+        f.write(VIEWER_HTML.replace("__TITLE__", html.escape(title))
+                .replace("__SUMMARY__", json.dumps(summary).replace("</", "<\\/")))
+    return index_file
+
+
+def clear_data_dir(data_dir):
+    """Create data_dir, or empty it of an earlier viewer's chunks.
+
+    Raises ValueError, before deleting anything, if it holds anything else,
+    so pointing --output-dir at an unrelated directory cannot delete its data.
+    """
+    if not os.path.isdir(data_dir):
+        os.makedirs(data_dir)
+        return
+    entries = sorted(os.scandir(data_dir), key=lambda entry: entry.name)
+    foreign = [entry.name for entry in entries if not (entry.is_file(follow_symlinks=False)
+                                                        and _CHUNK_FILE_RE.fullmatch(entry.name))]
+    if foreign:
+        raise ValueError(f"{data_dir} contains files the viewer did not write ({', '.join(foreign[:5])}); "
+                         "choose another --output-dir")
+    for entry in entries:
+        os.remove(entry.path)
+
+
+def write_chunk(data_dir, name, payload):
+    with open(os.path.join(data_dir, f"{name}.js"), "w", encoding="utf-8") as f:
+        f.write(f"rfViewer.receive({json.dumps(name)}, {json.dumps(payload, separators=(',', ':'))});\n")
+
+
+VIEWER_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+body { font-family: system-ui, sans-serif; margin: 1.5em; color: #222; }
+table { border-collapse: collapse; width: 100%; margin: .5em 0 1em; }
+th, td { border-bottom: 1px solid #ddd; padding: .3em .5em; text-align: left; vertical-align: top; }
+details { margin: .2em 0; } summary { cursor: pointer; }
+.FAIL { color: #c62828; } .PASS { color: #2e7d32; } .SKIP, .NOT { color: #8d6e00; }
+.message { white-space: pre-wrap; font-family: monospace; font-size: .9em; }
+.muted { color: #777; font-size: .9em; }
+button { margin: .3em 0; }
+</style>
+</head>
+<body>
+<h1>__TITLE__</h1>
+<p id="totals"></p>
+<p><input id="search" type="search" size="50" placeholder="Search test names, tags and messages">
+<span id="search-status" class="muted"></span></p>
+<div id="results"></div>
+<div id="suites"></div>
+<button id="more-suites" hidden>Show more suites</button>
+<script>
+const SUMMARY = __SUMMARY__;
+const rfViewer = {
+  pending: {}, loaded: {},
+  receive(name, payload) {
+    this.loaded[name] = payload;
+    (this.pending[name] || []).forEach(resolve => resolve(payload));
+    delete this.pending[name];
+  },
+  load(name) {
+    if (name in this.loaded) return Promise.resolve(this.loaded[name]);
+    return new Promise(resolve => {
+      if (!this.pending[name]) {
+        this.pending[name] = [];
+        const script = document.createElement("script");
+        script.src = "data/" + name + ".js";
+        script.onerror = () => this.receive(name, null);
+        document.head.appendChild(script);
+      }
+      this.pending[name].push(resolve);
+    });
+  },
+};
+
+function el(tag, attrs, ...children) {
+  const node = document.createElement(tag);
+  Object.assign(node, attrs || {});
+  children.forEach(child => node.append(child));
+  return node;
+}
+
+function testTable(rows) {
+  const table = el("table", {}, el("tr", {}, ...["Test", "Status", "Time (s)", "Message", "Tags", "File"]
+    .map(text => el("th", {}, text))));
+  rows.forEach(([name, status, elapsed, message, tags, keywords, file, lineno]) => {
+    const detail = el("div", {className: "message"}, message);
+    if (keywords.length) detail.append(el("div", {className: "muted"}, "↳ " + keywords.join(" › ")));
+    table.append(el("tr", {},
+      el("td", {}, name), el("td", {className: status.split(" ")[0]}, status), el("td", {}, String(elapsed)),
+      el("td", {}, detail), el("td", {}, tags.join(", ")),
+      el("td", {className: "muted"}, lineno ? file + ":" + lineno : file)));
+  });
+  return table;
+}
+
+function suiteBlock(suite) {
+  const counts = Object.entries(suite.counts).filter(([, n]) => n).map(([s, n]) => n + " " + s).join(", ");
+  const block = el("details", {}, el("summary", {className: suite.counts.FAIL ? "FAIL" : ""},
+    suite.name + " — " + counts + " — " + suite.elapsed + "s"));
+  let next = 0;
+  const more = el("button", {textContent: "Show more tests", hidden: true});
+  const loadNext = () => rfViewer.load("tests-" + suite.chunks[next++]).then(chunk => {
+    more.before(testTable(chunk.rows));
+    more.hidden = next >= suite.chunks.length;
+  });
+  more.onclick = loadNext;
+  block.append(more);
+  block.addEventListener("toggle", () => { if (block.open && next === 0) loadNext(); });
+  if (suite.counts.FAIL && suite.id < 10) block.open = true;
+  return block;
+}
+
+let suitePage = 0;
+function loadSuitePage() {
+  rfViewer.load("suites-" + suitePage++).then(suites => {
+    suites.forEach(suite => document.getElementById("suites").append(suiteBlock(suite)));
+    document.getElementById("more-suites").hidden = suitePage >= SUMMARY.suitePages;
+  });
+}
+
+async function termIds(term) {
+  const key = "search-" + Array.from(new TextEncoder().encode(Array.from(term).slice(0, SUMMARY.minTermChars).join("")))
+    .map(byte => byte.toString(16).padStart(2, "0")).join("");
+  const shard = await rfViewer.load(key) || {};
+  const ids = new Set();
+  Object.keys(shard).filter(token => token.startsWith(term)).forEach(token => {
+    let id = 0;
+    shard[token].forEach(gap => ids.add(id += gap));
+  });
+  return ids;
+}
+
+let searchGeneration = 0;
+async function search(query) {
+  const generation = ++searchGeneration;
+  const results = document.getElementById("results");
+  const status = document.getElementById("search-status");
+  const terms = (query.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || []).filter(t => t.length >= SUMMARY.minTermChars);
+  results.replaceChildren();
+  status.textContent = "";
+  if (!terms.length) return;
+  let ids = null;
+  for (const term of terms) {
+    const termMatches = await termIds(term);
+    ids = ids === null ? termMatches : new Set([...ids].filter(id => termMatches.has(id)));
+  }
+  const hits = [...ids].sort((a, b) => a - b).slice(0, 100);
+  const rows = [];
+  for (const id of hits) {
+    const chunk = await rfViewer.load("tests-" + Math.floor(id / SUMMARY.pageSize));
+    rows.push(chunk.rows[id % SUMMARY.pageSize]);
+  }
+  if (generation !== searchGeneration) return;
+  status.textContent = ids.size + " matching tests" + (ids.size > hits.length ? ", showing " + hits.length : "");
+  if (rows.length) results.append(testTable(rows));
+}
+
+document.getElementById("totals").textContent = SUMMARY.total + " tests in " + SUMMARY.suites + " suites: " +
+  Object.entries(SUMMARY.counts).filter(([, n]) => n).map(([s, n]) => n + " " + s).join(", ");
+document.getElementById("more-suites").onclick = loadSuitePage;
+let searchTimer;
+document.getElementById("search").addEventListener("input", event => {
+  clearTimeout(searchTimer);
+  searchTimer = setTimeout(() => search(event.target.value), 200);
+});
+if (SUMMARY.suitePages) loadSuitePage();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a lazily loaded static HTML viewer for Robot Framework results")
+    parser.add_argument("output_files", nargs="+", help="output.xml files to include; reruns of a test count once")
+    parser.add_argument("--output-dir", default="results-viewer", help="Directory for index.html and its data chunks")
+    parser.add_argument("--engine", choices=ENGINES, default="stream",
+                        help="Result parser; 'triage' keeps tags of failed tests only")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Tests per data chunk")
+    parser.add_argument("--title", default="Robot Framework Results", help="Page title")
+    args = parser.parse_args()
+
+    output_files = [f for f in args.output_files if os.path.isfile(f)]
+    if not output_files:
+        print(f"❌ Error: None of {', '.join(args.output_files)} exist.")
+        sys.exit(1)
+
+    visitor = MyResultVisitor(markdown_file=os.path.join(args.output_dir, "report.md"), dedupe=True)
+    for output_file in attempt_order(output_files):
+        print(f"📂 Processing: {output_file}")
+        load_result(output_file, args.engine).visit(visitor)
+
+    try:
+        index_file = write_viewer(visitor.store, args.output_dir, args.title, max(1, args.page_size))
+    except ValueError as error:
+        print(f"❌ Error: {error}")
+        sys.exit(1)
+    print(f"🌐 Viewer written: {index_file}")
@@ -0,0 +1,242 @@
+import os
+import re
+import sys
+import json
+import time
+import resource
+import subprocess
+from contextlib import contextmanager
+
+TRACE_ENV_VAR = "ROBOT_RESULTS_TRACE"  # "1" to print a summary, or a path to also write the JSON trace
+HEAVY_PACKAGES = ("robot", "requests")  # imports that dominate a script's cold start
+
+_open_spans = []  # started, unstopped spans; each keeps the peak seen before a nested span reset it
+
+
+def read_bytes_so_far():
+    """Bytes this process has read through read() syscalls (Linux /proc), or None if unavailable."""
+    try:
+        with open("/proc/self/io", "rb") as f:
+            for line in f:
+                if line.startswith(b"rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process over its whole lifetime in KB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def high_water_rss_kb():
+    """Peak RSS since the last reset_high_water_rss() in KB (Linux VmHWM), or None if unavailable."""
+    try:
+        with open("/proc/self/status", "rb") as f:
+            match = re.search(rb"^VmHWM:\s+(\d+)", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+
+def reset_high_water_rss():
+    """Reset this process's peak RSS to its current RSS; False where /proc/self/clear_refs is not writable."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+class Span:
+    """Wall time, CPU time, peak RSS and bytes read for one traced block.
+
+    On Linux the kernel's RSS high-water mark is reset when a span starts, so
+    `peak_rss_kb` is the peak reached inside the span and `rss_scope` is
+    "span". Elsewhere it falls back to the process lifetime peak and
+    `rss_scope` is "process".
+    """
+
+    __slots__ = ("name", "attrs", "wall_s", "cpu_s", "peak_rss_kb", "rss_scope", "bytes_read",
+                 "_wall_start", "_cpu_start", "_read_start")
+
+    def __init__(self, name, attrs=None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.wall_s = self.cpu_s = 0.0
+        self.peak_rss_kb = 0
+        self.rss_scope = "process"
+        self.bytes_read = None
+
+    def start(self):
+        peak = high_water_rss_kb()
+        if peak is not None and reset_high_water_rss():
+            # The reset also hides this peak from the enclosing spans, so record it for them first.
+            for span in _open_spans:
+                span.peak_rss_kb = max(span.peak_rss_kb, peak)
+            self.rss_scope = "span"
+        _open_spans.append(self)
+        self._read_start = read_bytes_so_far()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def stop(self):
+        self.wall_s = time.perf_counter() - self._wall_start
+        self.cpu_s = time.process_time() - self._cpu_start
+        if self in _open_spans:
+            _open_spans.remove(self)
+        peak = high_water_rss_kb() if self.rss_scope == "span" else None
+        self.peak_rss_kb = max(self.peak_rss_kb, peak) if peak is not None else peak_rss_kb()
+        read_end = read_bytes_so_far()
+        if read_end is not None and self._read_start is not None:
+            self.bytes_read = read_end - self._read_start
+        return self
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "wall_s": round(self.wall_s, 6),
+            "cpu_s": round(self.cpu_s, 6),
+            "peak_rss_kb": self.peak_rss_kb,
+            "rss_scope": self.rss_scope,
+            "bytes_read": self.bytes_read,
+            **self.attrs,
+        }
+
+
+def rss_label(total):
+    """Peak RSS of a phase in MB, marked when it is the process lifetime peak rather than the phase's own."""
+    label = f"{total['peak_rss_kb'] / 1024:.1f} MB"
+    return label if total["rss_scope"] == "span" else f"{label} (process)"
+
+
+class Tracer:
+    """Collects spans for a run and renders them as a JSON trace or a summary table.
+
+    `span()` always measures, so callers can read `span.wall_s` for their own
+    output; spans are only recorded when the tracer is enabled.
+    """
+
+    def __init__(self, enabled=False, trace_file=None):
+        self.enabled = enabled
+        self.trace_file = trace_file
+        self.spans = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        span = Span(name, attrs).start()
+        try:
+            yield span
+        finally:
+            span.stop()
+            if self.enabled:
+                self.spans.append(span.to_dict())
+
+    def add(self, span_dict):
+        """Record a span measured elsewhere, e.g. in a worker process."""
+        if self.enabled:
+            self.spans.append(span_dict)
+
+    def phase_totals(self):
+        """Aggregate spans by name, keeping first-seen order."""
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                                                     "peak_rss_kb": 0, "rss_scope": "span", "bytes_read": 0})
+            total["count"] += 1
+            total["wall_s"] += span["wall_s"]
+            total["cpu_s"] += span["cpu_s"]
+            total["peak_rss_kb"] = max(total["peak_rss_kb"], span["peak_rss_kb"])
+            if span.get("rss_scope", "process") == "process":
+                total["rss_scope"] = "process"
+            total["bytes_read"] += span["bytes_read"] or 0
+        return totals
+
+    def summary_markdown(self):
+        """Return the per-phase summary as a Markdown table."""
+        lines = ["### ⏱️ Processing Time by Phase\n",
+                 "| Phase | Count | Wall | CPU | Peak RSS | Read |",
+                 "|-------|-------|------|-----|----------|------|"]
+        for name, total in self.phase_totals().items():
+            lines.append(f"| {name} | {total['count']} | {total['wall_s']:.2f}s | {total['cpu_s']:.2f}s | "
+                         f"{rss_label(total)} | {total['bytes_read'] / 1e6:.1f} MB |")
+        return "\n".join(lines) + "\n"
+
+    def print_summary(self):
+        print("\nProcessing time by phase:")
+        for name, total in self.phase_totals().items():
+            print(f"- {name} (x{total['count']}): {total['wall_s']:.2f}s wall, {total['cpu_s']:.2f}s cpu, "
+                  f"{rss_label(total)} peak RSS, {total['bytes_read'] / 1e6:.1f} MB read")
+
+    def write_json(self, path=None):
+        path = path or self.trace_file
+        if not path:
+            return None
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"spans": self.spans, "phases": self.phase_totals()}, f, indent=2)
+        return path
+
+    def append_markdown(self, markdown_file):
+        with open(markdown_file, "a", encoding="utf-8") as f:
+            f.write("\n" + self.summary_markdown())
+
+    def finish(self, markdown_file=None):
+        """Print the summary and write the JSON trace / Markdown section if configured."""
+        if not self.enabled:
+            return
+        self.print_summary()
+        if markdown_file:
+            self.append_markdown(markdown_file)
+        path = self.write_json()
+        if path:
+            print(f"🧭 Trace written to {path}")
+
+
+def measure_call(func, name, item):
+    """Call func(item) and return (result, span dict); used to trace work done in pool workers."""
+    span = Span(name, {"shard": str(item)}).start()
+    result = func(item)
+    return result, span.stop().to_dict()
+
+
+def measure_import(module, cwd=None):
+    """Import `module` in a fresh interpreter and return its cold-start cost.
+
+    Uses `python -X importtime`, so the numbers are what a workflow step pays:
+    `import_ms` is the module's cumulative import time, `process_ms` the wall
+    time of the whole interpreter run, and `heavy` lists the HEAVY_PACKAGES
+    the import pulled in.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=cwd, capture_output=True, text=True)
+    process_ms = (time.perf_counter() - start) * 1000
+    import_us, heavy = None, set()
+    for line in completed.stderr.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        if name.split(".")[0] in HEAVY_PACKAGES:
+            heavy.add(name.split(".")[0])
+        if name == module:
+            import_us = int(parts[1])
+    return {
+        "module": module,
+        "ok": completed.returncode == 0,
+        "import_ms": round(import_us / 1000, 1) if import_us is not None else None,
+        "process_ms": round(process_ms, 1),
+        "heavy": sorted(heavy),
+    }
+
+
+def tracer_from_env(trace=None):
+    """Build a Tracer from a --trace value, falling back to the ROBOT_RESULTS_TRACE env var."""
+    value = trace if trace is not None else os.getenv(TRACE_ENV_VAR)
+    if not value or value == "0":
+        return Tracer(enabled=False)
+    return Tracer(enabled=True, trace_file=None if value == "1" else value)
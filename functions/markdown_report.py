@@ -0,0 +1,188 @@
+import os
+
+GITHUB_SUMMARY_LIMIT = 65535
+DEFAULT_MAX_CHARS = 60000  # headroom under GitHub's check-run summary limit
+TAIL_RESERVE_CHARS = 2000  # kept free for the aggregate table and truncation notes
+
+MAX_CLUSTER_MESSAGE_CHARS = 300
+CLUSTER_HEADING = "### 🧩 Failures by Cause\n"  # also how check.py tells that report.md already has clusters
+CLUSTER_HEADER = "| Failure | Tests | Sample Tests |\n|---------|-------|--------------|\n"
+
+STATUS_LABELS = {
+    "FAIL": "❌ FAIL",
+    "SKIP": "⏭️ SKIP",
+    "NOT RUN": "⏸️ NOT RUN",
+    "PASS": "✅ PASS",
+}
+REPORT_ORDER = ("FAIL", "SKIP", "NOT RUN", "PASS")  # order of the report's test rows
+
+
+class BoundedWriter:
+    """Writes text to a file until a character budget is used up."""
+
+    def __init__(self, f, max_chars):
+        self.f = f
+        self.max_chars = max_chars
+        self.used = 0
+
+    def write(self, text, limit=None):
+        """Write text if it fits under `limit` (default: the full budget); return whether it was written."""
+        limit = self.max_chars if limit is None else limit
+        if limit is not None and self.used + len(text) > limit:
+            return False
+        self.f.write(text)
+        self.used += len(text)
+        return True
+
+
+def full_report_path(markdown_file):
+    """Return the path of the untruncated report written next to markdown_file."""
+    base, ext = os.path.splitext(markdown_file)
+    return f"{base}-full{ext or '.md'}"
+
+
+def markdown_cell(text):
+    """Escape text so it stays inside a single Markdown table cell."""
+    return str(text).replace("|", "\\|").replace("\r\n", "<br>").replace("\n", "<br>")
+
+
+def summary_lines(store):
+    total_tests = store.count()
+    skipped_count = store.count("SKIP")
+    lines = [
+        "### Test Results Summary\n\n",
+        f"- 📊 **Total Tests:** {total_tests}\n",
+        f"- ✅ **Passed:** {store.count('PASS')}\n",
+        f"- ❌ **Failed:** {store.count('FAIL')}\n",
+    ]
+    if skipped_count:
+        lines.append(f"- ⏭️ **Skipped:** {skipped_count}\n")
+    if store.count("NOT RUN"):
+        lines.append(f"- ⏸️ **Not Run:** {store.count('NOT RUN')}\n")
+    flaky = getattr(store, "flaky", ())
+    if flaky:
+        lines.append(f"- 🔁 **Flaky:** {len(flaky)} (passed and failed across {store.reruns} reruns)\n")
+    lines.append("\n")
+    return lines
+
+
+def test_row(test):
+    message = markdown_cell(test.message) if test.status != "PASS" else ""
+    if test.keywords:
+        message += "<br>↳ " + markdown_cell(" › ".join(test.keywords))
+    return f"| {markdown_cell(test.name)} | {markdown_cell(test.file)} | {STATUS_LABELS.get(test.status, test.status)} | {message} |\n"
+
+
+def cluster_row(cluster):
+    message = cluster.message
+    if len(message) > MAX_CLUSTER_MESSAGE_CHARS:
+        message = message[:MAX_CLUSTER_MESSAGE_CHARS] + "…"
+    samples = ", ".join(f"{name} ({file})" for name, file in cluster.samples)
+    if cluster.count > len(cluster.samples):
+        samples += ", …"
+    return f"| {markdown_cell(message)} | {cluster.count} | {markdown_cell(samples)} |\n"
+
+
+def write_markdown_report(store, markdown_file, max_chars=DEFAULT_MAX_CHARS, full_report_file=None, sections=(),
+                          clusters=None):
+    """Stream a TestResultStore to a Markdown report that fits in max_chars characters.
+
+    Failures are written first, then skips and tests that did not run, then
+    passes. Once the budget is reached, remaining failures, skips and tests
+    that did not run are counted and remaining passes collapse into a
+    per-file table. Every row also goes to full_report_file, when given,
+    without any limit. Only per-file counters are held in memory, so the
+    cost stays flat as the number of tests grows. Extra Markdown `sections`
+    are appended after the table, with room reserved for them up front.
+    With failure `clusters`, the bounded report lists one row per cluster
+    instead of one per failed test; the full report still has every test.
+    Returns True if the bounded report was truncated.
+    """
+    sections = ["\n" + section for section in sections]
+    sections_chars = sum(len(section) for section in sections)
+    row_limit = max(max_chars - TAIL_RESERVE_CHARS - sections_chars, 0) if max_chars else None
+    omitted = {"FAIL": 0, "SKIP": 0, "NOT RUN": 0, "clusters": 0}
+    collapsed = {}
+
+    full = open(full_report_file, "w", encoding="utf-8") if full_report_file else None
+    try:
+        with open(markdown_file, "w", encoding="utf-8") as f:
+            report = BoundedWriter(f, max_chars)
+            writers = [report] + ([BoundedWriter(full, None)] if full else [])
+
+            for line in summary_lines(store):
+                for writer in writers:
+                    writer.write(line)
+            if store.count() == 0:
+                write_sections(writers, sections)
+                return False
+
+            truncated = False
+            if clusters:
+                report.write(CLUSTER_HEADING + "\n" + CLUSTER_HEADER)
+                for cluster in clusters:
+                    if truncated or not report.write(cluster_row(cluster), row_limit):
+                        truncated = True
+                        omitted["clusters"] += 1
+                report.write("\n")
+
+            header = "| Test Name | File | Status | Message |\n|-----------|------|--------|---------|\n"
+            for writer in writers:
+                writer.write(header)
+
+            for status in REPORT_ORDER:
+                for test in store.iter_tests(status):
+                    row = test_row(test)
+                    if full:
+                        full.write(row)
+                    if clusters and status == "FAIL":
+                        continue
+                    if not truncated and report.write(row, row_limit):
+                        continue
+                    truncated = True
+                    if status == "PASS":
+                        collapsed[test.file] = collapsed.get(test.file, 0) + 1
+                    else:
+                        omitted[status] += 1
+
+            if truncated:
+                write_truncation_tail(report, omitted, collapsed, full_report_file, sections_chars)
+            write_sections(writers, sections)
+            return truncated
+    finally:
+        if full:
+            full.close()
+
+
+def write_sections(writers, sections):
+    for section in sections:
+        for writer in writers:
+            writer.write(section)
+
+
+def truncation_note(max_chars, full_report_file=None):
+    """The note ending a report cut to max_chars, pointing at the full report when there is one."""
+    where = f" See `{os.path.basename(full_report_file)}` for every test." if full_report_file else ""
+    return f"\n> ⚠️ Report truncated to {max_chars} characters.{where}\n"
+
+
+def write_truncation_tail(report, omitted, collapsed, full_report_file, reserved=0):
+    """Write omission notes and the collapsed pass table, leaving `reserved` characters for later sections."""
+    limit = report.max_chars - reserved
+    note_limit = limit - 300
+    if omitted["clusters"]:
+        report.write(f"\n_… {omitted['clusters']} more failure clusters not shown._\n", note_limit)
+    for status, label in (("FAIL", "failed"), ("SKIP", "skipped"), ("NOT RUN", "not run")):
+        if omitted[status]:
+            report.write(f"\n_… {omitted[status]} more {label} tests not shown._\n", note_limit)
+
+    if collapsed:
+        header = "\n#### ✅ Passed tests by file\n\n| File | Passed |\n|------|--------|\n"
+        hidden_files = 0 if report.write(header, note_limit) else len(collapsed)
+        for file_name, count in sorted(collapsed.items()) if not hidden_files else ():
+            if not report.write(f"| {markdown_cell(file_name)} | {count} |\n", note_limit):
+                hidden_files += 1
+        if hidden_files:
+            report.write(f"\n_… {hidden_files} more files not shown._\n", note_limit)
+
+    report.write(truncation_note(report.max_chars, full_report_file), limit)
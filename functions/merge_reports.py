@@ -1,124 +1,290 @@
-import os
-import glob
-from datetime import datetime
-from robot.api import ExecutionResult
-import sys
-import argparse
-
-def parse_robot_timestamp(timestamp_str):
-    """Convert Robot Framework timestamp string to datetime object"""
-    if not timestamp_str:
-        return None
-    try:
-        clean_ts = timestamp_str.split('.')[0]
-        return datetime.strptime(clean_ts, '%Y%m%d %H:%M:%S')
-    except (ValueError, AttributeError) as e:
-        print(f"Warning: Failed to parse timestamp '{timestamp_str}': {str(e)}")
-        return None
-
-def find_results_directories(base_dir='robot-test-results', base_pattern='robot-test-results-'):
-    """Find all directories matching the base pattern inside base_dir"""
-    search_path = os.path.join(base_dir, f"{base_pattern}*")
-    return [d for d in glob.glob(search_path) if os.path.isdir(d)]
-
-def find_robot_results(directory):
-    """Find all valid robot output files in a directory"""
-    patterns = ['output.xml', '**/output.xml']
-    found_files = set()
-    
-    for pattern in patterns:
-        for filepath in glob.glob(os.path.join(directory, pattern), recursive=True):
-            if os.path.isfile(filepath):
-                try:
-                    ExecutionResult(filepath)  # Validate it's a Robot file
-                    found_files.add(os.path.abspath(filepath))
-                except:
-                    continue
-    return sorted(found_files)
-
-def merge_reports(results_dirs, output_dir):
-    """Merge all Robot Framework output files into a single report"""
-    all_files = []
-    for directory in results_dirs:
-        files = find_robot_results(directory)
-        if files:
-            print(f"Found {len(files)} result files in {directory}:")
-            for f in files:
-                print(f"  - {f}")
-            all_files.extend(files)
-        else:
-            print(f"Warning: No valid Robot output files found in {directory}")
-
-    if not all_files:
-        print("Error: No valid result files found in any directory")
-        return False
-
-    start_times = []
-    end_times = []
-    valid_files = []
-
-    for xml_file in all_files:
-        try:
-            result = ExecutionResult(xml_file)
-            start_dt = parse_robot_timestamp(getattr(result.suite, 'starttime', ''))
-            end_dt = parse_robot_timestamp(getattr(result.suite, 'endtime', ''))
-            if start_dt and end_dt:
-                start_times.append(start_dt)
-                end_times.append(end_dt)
-                valid_files.append(xml_file)
-        except Exception as e:
-            print(f"Warning: Error processing {xml_file}: {str(e)}")
-
-    if not valid_files:
-        print("Error: No files with valid timestamps found")
-        return False
-
-    os.makedirs(output_dir, exist_ok=True)
-    output_base = os.path.join(output_dir, "")
-
-    start_time = min(start_times).strftime('%Y%m%d %H:%M:%S')
-    end_time = max(end_times).strftime('%Y%m%d %H:%M:%S')
-
-    cmd = (
-        f'rebot '
-        f'--starttime "{start_time}" '
-        f'--endtime "{end_time}" '
-        f'--output {output_base}output.xml '
-        f'--log {output_base}log.html '
-        f'--report {output_base}report.html '
-        f'{" ".join(valid_files)}'
-    )
-
-    print("\nExecuting merge command:")
-    print(cmd)
-    if os.system(cmd) != 0:
-        print("Error: rebot command failed")
-        return False
-
-    print("\nSuccessfully created:")
-    print(f"- {output_base}output.xml")
-    print(f"- {output_base}log.html")
-    print(f"- {output_base}report.html")
-    return True
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Merge Robot Framework results")
-    parser.add_argument("--output-dir", type=str, default="merged-results", help="Directory to write merged results into")
-    args = parser.parse_args()
-
-    print("Robot Framework Report Merger")
-    print("=" * 50)
-
-    # Find all matching result directories
-    results_dirs = find_results_directories()
-    
-    if not results_dirs:
-        print("No robot-test-results-* directories found")
-        sys.exit(1)
-
-    print(f"Found {len(results_dirs)} results directories:")
-    for d in results_dirs:
-        print(f"- {d}")
-
-    if not merge_reports(results_dirs, args.output_dir):
-        sys.exit(1)
+import os
+import glob
+from collections import Counter
+from datetime import datetime
+import sys
+import argparse
+from instrumentation import Tracer, tracer_from_env
+from rerun_merge import has_flip
+from result_index import top_suite, write_index
+from shard_pool import map_shards
+from stream_results import load_result
+
+# rebot's return code is the failed test count capped at 250; larger values are errors.
+REBOT_MAX_FAILURE_RC = 250
+
+def parse_robot_timestamp(timestamp_str):
+    """Convert Robot Framework timestamp string to datetime object"""
+    if not timestamp_str:
+        return None
+    try:
+        clean_ts = timestamp_str.split('.')[0]
+        return datetime.strptime(clean_ts, '%Y%m%d %H:%M:%S')
+    except (ValueError, AttributeError) as e:
+        print(f"Warning: Failed to parse timestamp '{timestamp_str}': {str(e)}")
+        return None
+
+def find_results_directories(base_dir='robot-test-results', base_pattern='robot-test-results-'):
+    """Find all directories matching the base pattern inside base_dir"""
+    search_path = os.path.join(base_dir, f"{base_pattern}*")
+    return [d for d in glob.glob(search_path) if os.path.isdir(d)]
+
+def find_candidate_files(directory):
+    """Find all output.xml files in a directory without validating them"""
+    patterns = ['output.xml', '**/output.xml']
+    found_files = set()
+
+    for pattern in patterns:
+        for filepath in glob.glob(os.path.join(directory, pattern), recursive=True):
+            if os.path.isfile(filepath):
+                found_files.add(os.path.abspath(filepath))
+    return sorted(found_files)
+
+def find_robot_results(directory):
+    """Find all valid robot output files in a directory
+
+    Files are validated by sniffing their root element and top-level suite
+    status rather than by a full parse; the sniffed suite is cached so
+    merge_reports can read its timestamps without opening the file again.
+    """
+    return [f for f in find_candidate_files(directory) if top_suite(f) is not None]
+
+def merge_reports(results_dirs, output_dir, jobs=1, tracer=None):
+    """Merge all Robot Framework output files into a single report
+
+    With jobs > 1 the shards are sniffed in a process pool; results come back
+    in discovery order, so the rebot command does not depend on `jobs`. The
+    sniff only reads each file's head and tail, which is cheaper than hashing
+    the file for a SummaryCache lookup, so it is not kept there. An enabled
+    Tracer additionally records every phase and shard.
+    """
+    tracer = tracer or Tracer()
+    timings = {}
+    with tracer.span("glob", directories=len(results_dirs)) as span:
+        candidates = {directory: find_candidate_files(directory) for directory in results_dirs}
+        candidate_files = [f for files in candidates.values() for f in files]
+    timings["glob"] = span.wall_s
+    with tracer.span("sniff", shards=len(candidate_files), jobs=jobs) as span:
+        sniffed = map_shards(top_suite, candidate_files, jobs, tracer, span_name="sniff_shard")
+        suites = dict(zip(candidate_files, sniffed))
+    timings["sniff"] = span.wall_s
+
+    all_files = []
+    for directory in results_dirs:
+        files = [f for f in candidates[directory] if suites[f] is not None]
+        if files:
+            print(f"Found {len(files)} result files in {directory}:")
+            for f in files:
+                print(f"  - {f}")
+            all_files.extend(files)
+        else:
+            print(f"Warning: No valid Robot output files found in {directory}")
+
+    if not all_files:
+        print("Error: No valid result files found in any directory")
+        return False
+
+    return merge_output_files(all_files, output_dir, suites=suites, tracer=tracer, timings=timings)
+
+def merge_output_files(output_files, output_dir, suites=None, tracer=None, timings=None):
+    """Merge the given output files with rebot, without searching any directory
+
+    `suites` maps files to their already sniffed top-level suites; files not
+    in it are sniffed here.
+    """
+    tracer = tracer or Tracer()
+    timings = {} if timings is None else timings
+    suites = dict(suites or {})
+    missing = [f for f in output_files if f not in suites]
+    if missing:
+        with tracer.span("sniff", shards=len(missing)) as span:
+            suites.update(zip(missing, map(top_suite, missing)))
+        timings["sniff"] = span.wall_s
+    all_files = [f for f in output_files if suites[f] is not None]
+
+    start_times = []
+    end_times = []
+    valid_files = []
+
+    with tracer.span("timestamps") as span:
+        for xml_file in all_files:
+            try:
+                suite = suites[xml_file]
+                start_dt = parse_robot_timestamp(getattr(suite, 'starttime', ''))
+                end_dt = parse_robot_timestamp(getattr(suite, 'endtime', ''))
+                if start_dt and end_dt:
+                    start_times.append(start_dt)
+                    end_times.append(end_dt)
+                    valid_files.append(xml_file)
+            except Exception as e:
+                print(f"Warning: Error processing {xml_file}: {str(e)}")
+    timings["timestamps"] = span.wall_s
+
+    if not valid_files:
+        print("Error: No files with valid timestamps found")
+        return False
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_base = os.path.join(output_dir, "")
+
+    start_time = min(start_times).strftime('%Y%m%d %H:%M:%S')
+    end_time = max(end_times).strftime('%Y%m%d %H:%M:%S')
+
+    with tracer.span("find_reruns", shards=len(valid_files)) as span:
+        attempts = group_attempts(valid_files, suites)
+    timings["find_reruns"] = span.wall_s
+    if attempts:
+        with tracer.span("merge_attempts", shards=sum(map(len, attempts))) as span:
+            valid_files = merge_attempts(valid_files, attempts, os.path.join(output_dir, "attempts"))
+        timings["merge_attempts"] = span.wall_s
+
+    print(f"\nMerging {len(valid_files)} result files with rebot ({start_time} - {end_time})")
+    with tracer.span("rebot", shards=len(valid_files)) as span:
+        rc = run_rebot(valid_files, output_base, start_time, end_time)
+    timings["rebot"] = span.wall_s
+
+    index_file = None
+    if rc <= REBOT_MAX_FAILURE_RC:
+        with tracer.span("index") as span:
+            index_file = write_merged_index(f"{output_base}output.xml")
+        timings["index"] = span.wall_s
+
+    print_timings(timings)
+    if rc > REBOT_MAX_FAILURE_RC:
+        print(f"Error: rebot failed with return code {rc}")
+        return False
+
+    print("\nSuccessfully created:")
+    print(f"- {output_base}output.xml")
+    print(f"- {output_base}log.html")
+    print(f"- {output_base}report.html")
+    if index_file:
+        print(f"- {index_file}")
+    return True
+
+def test_names(xml_file):
+    """Full names of the tests in an output file, read from its index when there is one"""
+    result = load_result(xml_file, "triage", use_index=True)
+    names = {test.longname for test in result.iter_tests()}
+    if hasattr(result, "close"):
+        result.close()
+    return names
+
+def group_attempts(files, suites):
+    """Return groups of files that ran the same tests again, each group ordered oldest first
+
+    Only files with the same top-level suite that share at least one test
+    are grouped; those are retries. Shards split from one data source run
+    disjoint tests and are left to the normal combine.
+    """
+    by_suite = {}
+    for xml_file in files:
+        by_suite.setdefault(suites[xml_file].name, []).append(xml_file)
+
+    groups = []
+    for candidates in by_suite.values():
+        if len(candidates) < 2:
+            continue
+        names = {xml_file: test_names(xml_file) for xml_file in candidates}
+        owners = Counter(name for file_names in names.values() for name in file_names)
+        retried = [f for f in candidates if any(owners[name] > 1 for name in names[f])]
+        if len(retried) > 1:
+            groups.append(sorted(retried, key=lambda f: suites[f].starttime or ""))
+    return groups
+
+def merge_attempts(files, groups, work_dir):
+    """Replace each group of retried outputs in files with one rebot --merge output and return the new list
+
+    In merge mode a test found again in a later output replaces the earlier
+    attempt. rebot wraps the kept attempt's message in its own HTML, which
+    also records the earlier statuses; the result readers unwrap the message
+    (stream_results.merged_message) and keep those statuses for flaky
+    detection (stream_results.earlier_statuses). A group that rebot cannot
+    merge is kept as separate files.
+    """
+    replaced = {}
+    for number, group in enumerate(groups, start=1):
+        os.makedirs(work_dir, exist_ok=True)
+        output = os.path.join(work_dir, f"attempts-{number}.xml")
+        print(f"Merging {len(group)} attempts of the same tests into {output}")
+        rc = run_rebot(group, output, merge=True)
+        if rc > REBOT_MAX_FAILURE_RC:
+            print(f"Warning: rebot --merge failed with return code {rc}; combining the files instead")
+            continue
+        flaky = sum(has_flip([*test.attempts, test.status]) for test in load_result(output, "triage").iter_tests())
+        print(f"  {flaky} tests flipped between PASS and FAIL across these attempts")
+        for xml_file in group:
+            replaced[xml_file] = output
+
+    merged_files = []
+    for xml_file in files:
+        merged = replaced.get(xml_file, xml_file)
+        if merged not in merged_files:
+            merged_files.append(merged)
+    return merged_files
+
+def write_merged_index(output_file):
+    """Write the binary result index for the merged output so check.py can skip the XML; None on failure"""
+    try:
+        return write_index(output_file)
+    except Exception as e:
+        print(f"Warning: Could not write result index for {output_file}: {str(e)}")
+        return None
+
+def run_rebot(files, output_base, start_time=None, end_time=None, merge=False):
+    """Merge result files in-process through Robot's rebot API and return its return code
+
+    Paths are passed as a list rather than through a shell, so there is no
+    ARG_MAX limit, no quoting issue with spaces and no second interpreter.
+    With merge=True only `output_base` itself is written, as an output.xml.
+    """
+    from robot import rebot
+
+    if merge:
+        return rebot(*files, merge=True, output=output_base, log=None, report=None)
+    return rebot(
+        *files,
+        starttime=start_time,
+        endtime=end_time,
+        output=f"{output_base}output.xml",
+        log=f"{output_base}log.html",
+        report=f"{output_base}report.html",
+    )
+
+def print_timings(timings):
+    """Print the wall time spent in each merge phase"""
+    print("\nMerge phase timings:")
+    for phase, seconds in timings.items():
+        print(f"- {phase}: {seconds:.2f}s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge Robot Framework results")
+    parser.add_argument("--output-dir", type=str, default="merged-results", help="Directory to write merged results into")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of worker processes used to read shards (0 = one per CPU)")
+    parser.add_argument("--trace", type=str, nargs="?", const="1", default=None, help="Record per-phase and per-shard timings; optionally write the JSON trace to this path (default: $ROBOT_RESULTS_TRACE)")
+    parser.add_argument("--trace-markdown", type=str, default=None, help="Append the timing summary to this Markdown file, e.g. $GITHUB_STEP_SUMMARY")
+    args = parser.parse_args(argv)
+    tracer = tracer_from_env(args.trace)
+
+    print("Robot Framework Report Merger")
+    print("=" * 50)
+
+    # Find all matching result directories
+    results_dirs = find_results_directories()
+    
+    if not results_dirs:
+        print("No robot-test-results-* directories found")
+        sys.exit(1)
+
+    print(f"Found {len(results_dirs)} results directories:")
+    for d in results_dirs:
+        print(f"- {d}")
+
+    merged = merge_reports(results_dirs, args.output_dir, jobs=args.jobs, tracer=tracer)
+    tracer.finish(args.trace_markdown)
+
+    if not merged:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import hashlib
+from markdown_report import STATUS_LABELS, markdown_cell
+
+FLIP_STATUSES = {"PASS", "FAIL"}
+MAX_FLAKY_ROWS = 50
+FLAKY_HEADING = "### 🔁 Flaky Tests\n"  # also how check.py tells that report.md already lists them
+
+
+def test_key(longname):
+    """Stable 64-bit key for a test's full name, compact enough to ship in cached shard summaries."""
+    return int.from_bytes(hashlib.blake2b(longname.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def is_flip(previous, status):
+    """True when two attempts of a test disagree on passing versus failing."""
+    return previous != status and previous in FLIP_STATUSES and status in FLIP_STATUSES
+
+
+def has_flip(statuses):
+    """True when any two consecutive attempts, given oldest first, disagree on passing versus failing."""
+    return any(is_flip(previous, status) for previous, status in zip(statuses, statuses[1:]))
+
+
+class AttemptIndex:
+    """Latest status per test across repeated attempts, keyed in a hash index.
+
+    Attempts must be added oldest first; each later attempt of the same
+    test replaces the earlier one, and a test whose attempts flipped
+    between PASS and FAIL is remembered as flaky. Every add is O(1), so
+    reducing any number of shards stays linear in the total test count.
+    """
+
+    def __init__(self):
+        self.latest = {}
+        self.flaky = set()
+        self.reruns = 0
+
+    def add(self, key, status):
+        previous = self.latest.get(key)
+        if previous is not None:
+            self.reruns += 1
+            if is_flip(previous, status):
+                self.flaky.add(key)
+        self.latest[key] = status
+        return previous
+
+    def count(self, status=None):
+        if status is None:
+            return len(self.latest)
+        return sum(1 for value in self.latest.values() if value == status)
+
+
+def reduce_summaries(summaries):
+    """Combine per-shard check summaries into rerun-aware totals.
+
+    Shards are taken in start-time order so the latest attempt of each test
+    wins. A shard's own flaky tests and reruns, e.g. attempts rebot --merge
+    folded into one output, are added to those found across shards.
+    Returns counts, the failed test records of the final attempts, flaky
+    test records and the number of superseded attempts.
+    """
+    index = AttemptIndex()
+    failed = {}  # latest failing record per key; every flip across shards has one
+    flaky = {}  # records of tests that flipped within a shard
+    for summary in sorted(summaries, key=lambda s: s.get("starttime") or ""):
+        for key, status in summary.get("tests", []):
+            index.add(key, status)
+        for test in summary["failed_tests"]:
+            failed[test_key(test_longname(test))] = test
+        for test in summary.get("flaky_tests", []):
+            flaky[test_key(test_longname(test))] = test
+        index.reruns += summary.get("reruns", 0)
+    index.flaky.update(flaky)
+
+    return {
+        "total": index.count(),
+        "passed": index.count("PASS"),
+        "failed": index.count("FAIL"),
+        "skipped": index.count("SKIP"),
+        "failed_tests": [test for key, test in failed.items() if index.latest.get(key) == "FAIL"],
+        "flaky_tests": [dict(failed.get(key) or flaky[key], status=index.latest[key])
+                        for key in index.flaky if key in failed or key in flaky],
+        "reruns": index.reruns,
+    }
+
+
+def test_longname(test):
+    suite = test.get("suite")
+    return f"{suite}.{test['name']}" if suite else test["name"]
+
+
+def flaky_markdown(flaky_tests, max_rows=MAX_FLAKY_ROWS):
+    """Render tests whose attempts flipped between PASS and FAIL as a Markdown section."""
+    lines = [FLAKY_HEADING,
+             "Passed and failed in different attempts; candidates for quarantine.\n",
+             "| Test Name | File | Final Status |", "|-----------|------|--------------|"]
+    for test in flaky_tests[:max_rows]:
+        lines.append(f"| {markdown_cell(test['name'])} | {markdown_cell(test['file'])} | "
+                     f"{STATUS_LABELS.get(test['status'], test['status'])} |")
+    if len(flaky_tests) > max_rows:
+        lines.append(f"\n_… {len(flaky_tests) - max_rows} more flaky tests not shown._")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,313 @@
+import os
+import sys
+import mmap
+import struct
+import argparse
+from collections import Counter
+from result_store import STATUS_CODES, STATUSES, StringTable
+from stream_results import SuiteRecord, load_result, read_top_suite
+
+INDEX_MAGIC = b"RFRIDX\r\n"
+INDEX_VERSION = 2
+INDEX_EXTENSION = ".rfidx"
+INDEX_ENGINES = ("triage", "stream")  # the engines that produce suite/test events
+KEYWORD_SEPARATOR = "\x1f"
+
+# magic, version, flags, suite count, test count, string count,
+# size of the output.xml it was built from, then the section offsets.
+HEADER = struct.Struct("<8sHHIIIQQQQ")
+# name, longname, source, message, starttime, endtime, first test, test count, status, depth, elapsed
+SUITE = struct.Struct("<IIIIIIIIBB6xd")
+# name, suite index, message, failing keyword chain, earlier attempts' statuses, line number (-1 if unknown),
+# status, elapsed
+TEST = struct.Struct("<IIIIIiB3xd")
+TEST_STATUS_OFFSET = 24
+STRING_OFFSET = struct.Struct("<Q")
+
+
+def index_path(output_file):
+    """Return the path of the binary index kept next to an output.xml."""
+    return os.path.splitext(output_file)[0] + INDEX_EXTENSION
+
+
+def write_index(output_file, path=None, engine="triage"):
+    """Summarise output_file into a binary result index and return its path.
+
+    The file is a fixed header, one fixed-width record per suite (pre-order)
+    and per test (grouped by suite, document order within a suite) and a
+    string table holding every distinct name, path and message once. Tests
+    keep what the reports need: name, suite, line, status, elapsed time,
+    message, failing keyword chain and the statuses of attempts merged into
+    them by rebot --merge; keyword bodies are not stored.
+    """
+    path = path or index_path(output_file)
+    strings = StringTable()
+    strings.intern("")
+    suites, open_suites, tests = [], [], []
+
+    for event, record in load_result(output_file, engine).iter_events():
+        if event == "start_suite":
+            open_suites.append(len(suites))
+            suites.append([record, len(open_suites) - 1])
+        elif event == "test":
+            tests.append((open_suites[-1], record))
+        else:
+            suites[open_suites.pop()][0] = record
+
+    tests.sort(key=lambda item: item[0])  # stable, so document order is kept within each suite
+    counts = Counter(suite_index for suite_index, _ in tests)
+    first_tests = {}
+    for position, (suite_index, _) in enumerate(tests):
+        first_tests.setdefault(suite_index, position)
+
+    suite_records = bytearray()
+    for index, (suite, depth) in enumerate(suites):
+        suite_records += SUITE.pack(
+            strings.intern(suite.name), strings.intern(suite.longname), strings.intern(suite.source or ""),
+            strings.intern(suite.message or ""), strings.intern(suite.starttime or ""),
+            strings.intern(suite.endtime or ""), first_tests.get(index, 0), counts[index],
+            STATUS_CODES.get(suite.status, STATUS_CODES["NOT RUN"]), min(depth, 255), suite.elapsed or 0.0)
+
+    test_records = bytearray()
+    for suite_index, test in tests:
+        keywords = KEYWORD_SEPARATOR.join(getattr(test, "keywords", None) or ())
+        test_records += TEST.pack(
+            strings.intern(test.name), suite_index, strings.intern(test.message or ""),
+            strings.intern(keywords), strings.intern(KEYWORD_SEPARATOR.join(test.attempts)),
+            test.lineno if test.lineno is not None else -1,
+            STATUS_CODES.get(test.status, STATUS_CODES["NOT RUN"]), test.elapsed or 0.0)
+
+    encoded = [value.encode("utf-8") for value in strings.strings]
+    offsets = bytearray()
+    position = 0
+    for value in encoded:
+        offsets += STRING_OFFSET.pack(position)
+        position += len(value)
+    offsets += STRING_OFFSET.pack(position)
+
+    suites_offset = HEADER.size
+    tests_offset = suites_offset + len(suite_records)
+    strings_offset = tests_offset + len(test_records)
+    source_size = os.path.getsize(output_file)
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, len(suites), len(tests), len(encoded),
+                            source_size, suites_offset, tests_offset, strings_offset))
+        f.write(suite_records)
+        f.write(test_records)
+        f.write(offsets)
+        for value in encoded:
+            f.write(value)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+class IndexedSuite:
+    """One suite record; suites are few, so their strings are decoded once up front."""
+
+    __slots__ = ("position", "name", "longname", "source", "message", "starttime", "endtime",
+                 "first_test", "test_count", "status", "depth", "elapsed")
+
+    def __init__(self, index, position):
+        fields = SUITE.unpack_from(index.buffer, index.suites_offset + position * SUITE.size)
+        self.position = position
+        self.name, self.longname, self.source, self.message, self.starttime, self.endtime = (
+            index.string(string_id) for string_id in fields[:6])
+        self.source = self.source or None
+        self.starttime = self.starttime or None
+        self.endtime = self.endtime or None
+        self.first_test, self.test_count = fields[6], fields[7]
+        self.status = STATUSES[fields[8]]
+        self.depth = fields[9]
+        self.elapsed = fields[10]
+
+    def to_record(self):
+        """Copy the suite into a SuiteRecord that no longer needs the index to be open."""
+        record = SuiteRecord(self.name, self.source, self.longname)
+        for name in ("status", "message", "starttime", "endtime", "elapsed"):
+            setattr(record, name, getattr(self, name))
+        return record
+
+
+class IndexedTest:
+    """Read-only view of one test record with the attributes the visitors use."""
+
+    __slots__ = ("_index", "_fields", "_suite")
+
+    def __init__(self, index, position):
+        self._index = index
+        self._fields = TEST.unpack_from(index.buffer, index.tests_offset + position * TEST.size)
+        self._suite = index.suite_at(self._fields[1])
+
+    name = property(lambda self: self._index.string(self._fields[0]))
+    suite = property(lambda self: self._suite.longname)
+    source = property(lambda self: self._suite.source)
+    message = property(lambda self: self._index.string(self._fields[2]))
+    status = property(lambda self: STATUSES[self._fields[6]])
+    elapsed = property(lambda self: self._fields[7])
+
+    @property
+    def keywords(self):
+        chain = self._index.string(self._fields[3])
+        return chain.split(KEYWORD_SEPARATOR) if chain else []
+
+    @property
+    def attempts(self):
+        attempts = self._index.string(self._fields[4])
+        return tuple(attempts.split(KEYWORD_SEPARATOR)) if attempts else ()
+
+    @property
+    def lineno(self):
+        return self._fields[5] if self._fields[5] >= 0 else None
+
+    @property
+    def longname(self):
+        suite = self.suite
+        return f"{suite}.{self.name}" if suite else self.name
+
+
+class ResultIndex:
+    """Memory-mapped reader for a binary result index.
+
+    Supports the same `.suite`, `visit()`, `iter_tests()` and `iter_events()`
+    interface as the output.xml readers. Records are unpacked and strings
+    decoded straight from the mapping only when they are accessed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.suite_count, self.test_count, self.string_count, self.source_size,
+         self.suites_offset, self.tests_offset, self.strings_offset) = HEADER.unpack_from(self.buffer)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self.buffer.close()
+            raise ValueError(f"{path} is not a version {INDEX_VERSION} result index")
+        self._blob_offset = self.strings_offset + (self.string_count + 1) * STRING_OFFSET.size
+        self._suites = {}
+        self.suite = self.suite_at(0) if self.suite_count else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.buffer.close()
+
+    def string(self, string_id):
+        start, end = struct.unpack_from("<QQ", self.buffer, self.strings_offset + string_id * STRING_OFFSET.size)
+        return str(self.buffer[self._blob_offset + start:self._blob_offset + end], "utf-8")
+
+    def suite_at(self, position):
+        suite = self._suites.get(position)
+        if suite is None:
+            suite = self._suites[position] = IndexedSuite(self, position)
+        return suite
+
+    def status_counts(self):
+        """Count tests per status from the status bytes alone."""
+        counts = dict.fromkeys(STATUSES, 0)
+        for position in range(self.test_count):
+            counts[STATUSES[self.buffer[self.tests_offset + position * TEST.size + TEST_STATUS_OFFSET]]] += 1
+        return counts
+
+    def iter_events(self):
+        """Replay ('start_suite'|'end_suite'|'test', record) events, each suite's tests before its children."""
+        stack = []
+        for position in range(self.suite_count):
+            suite = self.suite_at(position)
+            while stack and stack[-1].depth >= suite.depth:
+                yield "end_suite", stack.pop()
+            yield "start_suite", suite
+            stack.append(suite)
+            for test_position in range(suite.first_test, suite.first_test + suite.test_count):
+                yield "test", IndexedTest(self, test_position)
+        while stack:
+            yield "end_suite", stack.pop()
+
+    def iter_tests(self):
+        for position in range(self.test_count):
+            yield IndexedTest(self, position)
+
+    def visit(self, visitor):
+        for event, record in self.iter_events():
+            if event == "test":
+                visitor.visit_test(record)
+            elif event == "start_suite":
+                visitor.start_suite(record)
+            else:
+                visitor.end_suite(record)
+
+
+def open_index(output_file):
+    """Return a ResultIndex for output_file if an up-to-date one exists next to it, else None.
+
+    An index is stale when the output.xml it was built from is present and
+    either has a different size or a top suite with different start and end
+    times. Artifact transfers do not keep mtimes, and a rerun often writes a
+    file of exactly the same size, but its timestamps always change; they
+    are sniffed from the head and tail of the XML without parsing it.
+    """
+    path = index_path(output_file)
+    if not os.path.isfile(path):
+        return None
+    try:
+        index = ResultIndex(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"⚠️ Ignoring unreadable index {path}: {e}")
+        return None
+    if os.path.isfile(output_file) and not is_current(index, output_file):
+        index.close()
+        return None
+    return index
+
+
+def cache_key_path(output_file):
+    """Path to hash when caching a summary of output_file: its index if that is up to date, else the XML.
+
+    The index is what load_result(use_index=True) reads, and hashing it
+    avoids reading the whole output.xml just to find a cache entry.
+    """
+    index = open_index(output_file)
+    if index is None:
+        return output_file
+    index.close()
+    return index.path
+
+
+def is_current(index, output_file):
+    """True when index was built from output_file as it is now."""
+    if os.path.getsize(output_file) != index.source_size:
+        return False
+    suite = read_top_suite(output_file)
+    return (suite is not None and index.suite is not None
+            and (suite.starttime, suite.endtime) == (index.suite.starttime, index.suite.endtime))
+
+
+def top_suite(output_file):
+    """Top-level suite of an output.xml from its index when available, otherwise by sniffing the XML."""
+    index = open_index(output_file)
+    if index is None:
+        return read_top_suite(output_file)
+    with index:
+        return index.suite.to_record() if index.suite else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a compact binary result index next to output.xml files")
+    parser.add_argument("output_files", nargs="+", help="output.xml files to index")
+    parser.add_argument("--engine", choices=INDEX_ENGINES, default="triage", help="Parser used to read the XML once")
+    args = parser.parse_args()
+
+    failed = False
+    for output_file in args.output_files:
+        try:
+            path = write_index(output_file, engine=args.engine)
+        except Exception as e:
+            print(f"❌ Failed to index {output_file}: {e}")
+            failed = True
+            continue
+        print(f"🗂️ {output_file} ({os.path.getsize(output_file) / 1e6:.1f} MB) -> "
+              f"{path} ({os.path.getsize(path) / 1e6:.2f} MB)")
+    sys.exit(1 if failed else 0)
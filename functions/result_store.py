@@ -0,0 +1,222 @@
+from array import array
+from rerun_merge import has_flip
+
+STATUSES = ("PASS", "FAIL", "SKIP", "NOT RUN")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}  # shared by the index and duration history
+TAG_SEPARATOR = "\x1f"
+
+
+class StringTable:
+    """Interns repeated strings (suite and file names) and hands out integer ids."""
+
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def intern(self, value):
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class StoredTest:
+    """Read-only view of one row in a TestResultStore."""
+
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self.index = index
+
+    @property
+    def name(self):
+        return self._store.names[self.index]
+
+    @property
+    def file(self):
+        return self._store.strings[self._store.file_ids[self.index]]
+
+    @property
+    def source(self):
+        return self._store.strings[self._store.source_ids[self.index]]
+
+    @property
+    def suite(self):
+        return self._store.strings[self._store.suite_ids[self.index]]
+
+    @property
+    def longname(self):
+        suite = self.suite
+        return f"{suite}.{self.name}" if suite else self.name
+
+    @property
+    def status(self):
+        return STATUSES[self._store.status_codes[self.index]]
+
+    @property
+    def message(self):
+        return self._store.messages.get(self.index, "")
+
+    @property
+    def keywords(self):
+        return self._store.keywords.get(self.index, [])
+
+    @property
+    def tags(self):
+        tags = self._store.strings[self._store.tag_ids[self.index]]
+        return tags.split(TAG_SEPARATOR) if tags else []
+
+    @property
+    def lineno(self):
+        lineno = self._store.linenos[self.index]
+        return lineno if lineno >= 0 else None
+
+    @property
+    def elapsed(self):
+        return self._store.elapsed[self.index]
+
+    @property
+    def flaky(self):
+        return self.index in self._store.flaky
+
+    def as_dict(self):
+        """Return the row in the dict shape MyResultVisitor used to keep per test."""
+        return {
+            "name": self.name,
+            "file": self.file,
+            "status": self.status,
+            "message": self.message if self.status == "FAIL" else "N/A",
+        }
+
+    def to_record(self):
+        """Return every column of the row as a plain, JSON-serializable dict."""
+        return {
+            "name": self.name,
+            "file": self.file,
+            "source": self.source,
+            "suite": self.suite,
+            "status": self.status,
+            "message": self.message,
+            "keywords": self.keywords,
+            "tags": self.tags,
+            "lineno": self.lineno,
+            "elapsed": self.elapsed,
+        }
+
+
+class TestResultStore:
+    """Column-oriented store of test results.
+
+    Each attribute lives in its own array, suite and file names and tag sets
+    are interned in a shared string table, and messages and failing keyword
+    chains are only kept for tests that did not pass. Per-status counters are
+    maintained on insert, so counts never require a pass over the rows.
+
+    With dedupe=True, tests are keyed by suite path and name in a hash
+    index: a later attempt of the same test overwrites the earlier row, and
+    rows whose attempts flipped between PASS and FAIL are marked flaky.
+    Attempts must then be added oldest first. Attempts that rebot --merge
+    already folded into one test are passed as its `attempts` and counted
+    the same way, with or without dedupe.
+    """
+
+    def __init__(self, dedupe=False):
+        self.strings = StringTable()
+        self.names = []
+        self.file_ids = array("I")
+        self.source_ids = array("I")
+        self.suite_ids = array("I")
+        self.tag_ids = array("I")
+        self.status_codes = array("B")
+        self.linenos = array("i")
+        self.elapsed = array("d")
+        self.messages = {}
+        self.keywords = {}
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.dedupe = dedupe
+        self.rows = {}
+        self.flaky = set()
+        self.reruns = 0
+
+    def add(self, name, file, status, message="", suite="", lineno=None, elapsed=0.0, source="", keywords=None,
+            tags=None, attempts=()):
+        """Append one test result and update the status counters; `attempts` are earlier statuses, oldest first."""
+        if status not in STATUS_CODES:
+            status = "NOT RUN"
+        if self.dedupe:
+            key = f"{suite}.{name}" if suite else name
+            index = self.rows.get(key)
+            if index is not None:
+                return self._replace(index, file, status, message, lineno, elapsed, source, keywords, tags, attempts)
+            self.rows[key] = len(self.names)
+        index = len(self.names)
+        self.names.append(name)
+        self.file_ids.append(self.strings.intern(file))
+        self.source_ids.append(self.strings.intern(source or ""))
+        self.suite_ids.append(self.strings.intern(suite))
+        self.tag_ids.append(self.strings.intern(TAG_SEPARATOR.join(tags or ())))
+        self.status_codes.append(STATUS_CODES[status])
+        self.linenos.append(lineno if lineno is not None else -1)
+        self.elapsed.append(elapsed or 0.0)
+        if status != "PASS" and message:
+            self.messages[index] = message
+        if status != "PASS" and keywords:
+            self.keywords[index] = list(keywords)
+        self.counts[status] += 1
+        if attempts:
+            self._count_attempts(index, [*attempts, status])
+        return index
+
+    def _replace(self, index, file, status, message, lineno, elapsed, source, keywords, tags, attempts):
+        """Overwrite a row with a later attempt of the same test."""
+        previous = STATUSES[self.status_codes[index]]
+        self._count_attempts(index, [previous, *attempts, status])
+        self.counts[previous] -= 1
+        self.counts[status] += 1
+        self.file_ids[index] = self.strings.intern(file)
+        self.source_ids[index] = self.strings.intern(source or "")
+        self.tag_ids[index] = self.strings.intern(TAG_SEPARATOR.join(tags or ()))
+        self.status_codes[index] = STATUS_CODES[status]
+        self.linenos[index] = lineno if lineno is not None else -1
+        self.elapsed[index] = elapsed or 0.0
+        self.messages.pop(index, None)
+        self.keywords.pop(index, None)
+        if status != "PASS" and message:
+            self.messages[index] = message
+        if status != "PASS" and keywords:
+            self.keywords[index] = list(keywords)
+        return index
+
+    def _count_attempts(self, index, statuses):
+        """Count the superseded attempts of a row and mark it flaky if they flipped; statuses oldest first."""
+        self.reruns += len(statuses) - 1
+        if has_flip(statuses):
+            self.flaky.add(index)
+
+    def __len__(self):
+        return len(self.names)
+
+    def count(self, status=None):
+        """Return the number of tests with the given status, or all tests."""
+        if status is None:
+            return len(self.names)
+        return self.counts.get(status, 0)
+
+    def iter_tests(self, status=None):
+        """Yield StoredTest views in insertion order, optionally filtered by status."""
+        if status is None:
+            for index in range(len(self.names)):
+                yield StoredTest(self, index)
+            return
+        code = STATUS_CODES[status]
+        for index, row_code in enumerate(self.status_codes):
+            if row_code == code:
+                yield StoredTest(self, index)
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from display_test_results import MyResultVisitor
+from markdown_report import DEFAULT_MAX_CHARS
+from merge_reports import REBOT_MAX_FAILURE_RC, merge_output_files
+from shard_planner import (DEFAULT_PREFIX, GRANULARITIES, collect_units, estimate_weights,
+                           historical_durations, plan_shards, print_plan, write_argument_files)
+from shard_pool import resolve_jobs
+from stream_results import ENGINES, load_result
+
+DEFAULT_DATA_SOURCES = ["webapp_tests/tests", "webapp_tests/api"]
+DEFAULT_PROCESSES_PER_CPU = 1
+_print_lock = threading.Lock()
+
+
+def run_shard(number, args_file, data_sources, robot_args=()):
+    """Run one shard as a robot subprocess, streaming its console output; return (rc, seconds)."""
+    command = [sys.executable, "-m", "robot", "--argumentfile", args_file,
+               "--consolecolors", "off", "--consolemarkers", "off", *robot_args, *data_sources]
+    start = time.perf_counter()
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                          text=True, bufsize=1) as process:
+        for line in process.stdout:
+            line = line.rstrip()
+            # Skip robot's separator lines; they are just noise once shards interleave.
+            if line and line.strip("=-"):
+                with _print_lock:
+                    print(f"[shard {number}] {line}", flush=True)
+    return process.returncode, time.perf_counter() - start
+
+
+def run_shards(args_files, data_sources, jobs, robot_args=()):
+    """Run every shard with at most `jobs` robot processes at a time; return {shard number: rc}."""
+    return_codes = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(run_shard, number, args_file, data_sources, robot_args): number
+                   for number, args_file in enumerate(args_files, start=1)}
+        for future in as_completed(futures):
+            number = futures[future]
+            rc, seconds = future.result()
+            return_codes[number] = rc
+            icon = "✅" if rc == 0 else "❌" if rc <= REBOT_MAX_FAILURE_RC else "💥"
+            with _print_lock:
+                print(f"{icon} Shard {number} finished in {seconds:.1f}s (rc={rc})", flush=True)
+    return return_codes
+
+
+def write_local_report(output_files, markdown_file, engine="robot", max_chars=DEFAULT_MAX_CHARS):
+    """Summarise the shard outputs into a Markdown report and return the visitor."""
+    visitor = MyResultVisitor(markdown_file=markdown_file)
+    for output_file in output_files:
+        load_result(output_file, engine).visit(visitor)
+    visitor.write_report(max_chars=max_chars)
+    return visitor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run Robot Framework shards in parallel, then merge and report")
+    parser.add_argument("data_sources", nargs="*", default=DEFAULT_DATA_SOURCES,
+                        help=f"Test directories or files (default: {' '.join(DEFAULT_DATA_SOURCES)})")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="Robot processes to run at once (0 = --processes-per-cpu for every CPU)")
+    parser.add_argument("--processes-per-cpu", type=int, default=DEFAULT_PROCESSES_PER_CPU,
+                        help="With --jobs 0, robot processes per CPU; raise it for suites that mostly wait on "
+                             "browsers, APIs or sleeps rather than the CPU")
+    parser.add_argument("--shards", type=int, default=None, help="Number of shards (default: same as --jobs)")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="test",
+                        help="Split by individual tests (default) or whole suite files")
+    parser.add_argument("--history", action="append", default=[],
+                        help="Directory with previous output.xml files used to balance shards (repeatable)")
+    parser.add_argument("--results-dir", default="robot-test-results/local",
+                        help="Directory each shard writes its robot-test-results-N output into")
+    parser.add_argument("--output-dir", default="merged-results/local", help="Directory for the merged results and report")
+    parser.add_argument("--engine", choices=ENGINES, default="stream", help="Result parser used for the report")
+    parser.add_argument("--max-report-chars", type=int, default=DEFAULT_MAX_CHARS, help="Character budget for report.md")
+    parser.add_argument("--robot-arg", action="append", default=[],
+                        help="Extra option passed to every robot run, e.g. --robot-arg=--include=smoke")
+    args = parser.parse_args()
+
+    jobs = args.jobs if args.jobs > 0 else resolve_jobs(0) * max(1, args.processes_per_cpu)
+    units = collect_units(args.data_sources, args.granularity)
+    if not units:
+        print(f"❌ Error: No tests found in {', '.join(args.data_sources)}.")
+        sys.exit(1)
+    durations = historical_durations([d for d in args.history if os.path.isdir(d)], args.granularity)
+    plan = plan_shards(estimate_weights(units, durations), args.shards or jobs)
+    print_plan(plan, args.granularity, bool(durations))
+
+    args_files = write_argument_files(plan, args.granularity, os.path.join(args.results_dir, "shards"),
+                                      args.results_dir, DEFAULT_PREFIX)
+    jobs = min(jobs, len(args_files))
+    print(f"🚀 Running {len(args_files)} shards with {jobs} parallel robot processes")
+    start = time.perf_counter()
+    return_codes = run_shards(args_files, args.data_sources, jobs, args.robot_arg)
+    print(f"⏱️ All shards finished in {time.perf_counter() - start:.1f}s")
+
+    # The shard outputs are known from the plan, so merge and report never glob for them.
+    output_files = [os.path.abspath(os.path.join(args.results_dir, f"{DEFAULT_PREFIX}-{number}", "output.xml"))
+                    for number in range(1, len(plan) + 1)]
+    output_files = [f for f in output_files if os.path.isfile(f)]
+    if not output_files:
+        print("❌ Error: No shard produced an output.xml")
+        sys.exit(1)
+
+    merged = merge_output_files(output_files, args.output_dir)
+    visitor = write_local_report(output_files, os.path.join(args.output_dir, "report.md"),
+                                 args.engine, args.max_report_chars)
+
+    errors = [number for number, rc in return_codes.items() if rc > REBOT_MAX_FAILURE_RC]
+    if errors:
+        print(f"💥 Shards with robot errors: {', '.join(map(str, sorted(errors)))}")
+    sys.exit(1 if errors or not merged or visitor.store.count("FAIL") else 0)
@@ -0,0 +1,153 @@
+import os
+import glob
+import heapq
+import argparse
+from merge_reports import find_candidate_files
+from stream_results import StreamingResult
+
+GRANULARITIES = ("suite", "test")
+DEFAULT_SHARDS = 4
+DEFAULT_PREFIX = "robot-test-results"
+PATTERN_SPECIAL = {"*": "[*]", "?": "[?]", "[": "[[]"}
+
+
+def full_name(item):
+    """Full dotted name of a robot.running suite or test (RF 7 `full_name`, older `longname`)."""
+    return getattr(item, "full_name", None) or item.longname
+
+
+def collect_units(data_sources, granularity="suite"):
+    """Return the full names of the suite files or tests robot would run for data_sources, in file order."""
+    from robot.api import TestSuiteBuilder
+
+    suite = TestSuiteBuilder().build(*data_sources)
+    units = []
+
+    def walk(suite):
+        if granularity == "test":
+            units.extend(full_name(test) for test in suite.tests)
+        elif suite.tests:
+            units.append(full_name(suite))
+        for child in suite.suites:
+            walk(child)
+
+    walk(suite)
+    return units
+
+
+def historical_durations(history_dirs, granularity="suite"):
+    """Average elapsed seconds per suite or test full name across previous output.xml files."""
+    totals = {}
+    for directory in history_dirs:
+        for output_file in find_candidate_files(directory):
+            try:
+                events = list(StreamingResult(output_file).iter_events())
+            except Exception as e:
+                print(f"⚠️ Skipping {output_file}: {e}")
+                continue
+            suites_with_tests = {record.suite for kind, record in events if kind == "test"}
+            for kind, record in events:
+                if granularity == "test" and kind == "test":
+                    name = record.longname
+                elif granularity == "suite" and kind == "end_suite" and record.longname in suites_with_tests:
+                    name = record.longname
+                else:
+                    continue
+                total = totals.setdefault(name, [0.0, 0])
+                total[0] += record.elapsed
+                total[1] += 1
+    return {name: elapsed / count for name, (elapsed, count) in totals.items()}
+
+
+def estimate_weights(units, durations):
+    """Pair every unit with its expected duration.
+
+    Units without history get the mean of the known ones, so a new file is
+    assumed to be average. With no history at all every unit weighs 1, which
+    balances shards by file (or test) count.
+    """
+    known = [durations[unit] for unit in units if unit in durations]
+    default = sum(known) / len(known) if known else 1.0
+    return [(unit, durations.get(unit, default)) for unit in units]
+
+
+def plan_shards(weighted_units, shards):
+    """Split (unit, weight) pairs into at most `shards` bins with the LPT heuristic.
+
+    Units are placed heaviest first onto the currently lightest shard, which
+    keeps the largest shard within 4/3 of the optimum. Each shard is returned
+    as {"units": [...], "estimate": seconds}, with units in their original order.
+    """
+    shards = max(1, min(shards, len(weighted_units)))
+    order = {unit: index for index, (unit, _) in enumerate(weighted_units)}
+    plan = [{"units": [], "estimate": 0.0} for _ in range(shards)]
+    heap = [(0.0, index) for index in range(shards)]
+    for unit, weight in sorted(weighted_units, key=lambda item: (-item[1], order[item[0]])):
+        load, index = heapq.heappop(heap)
+        plan[index]["units"].append(unit)
+        plan[index]["estimate"] = load + weight
+        heapq.heappush(heap, (load + weight, index))
+    for shard in plan:
+        shard["units"].sort(key=order.get)
+    return plan
+
+
+def escape_pattern(name):
+    """Escape glob characters so --test/--suite match the name literally."""
+    return "".join(PATTERN_SPECIAL.get(char, char) for char in name)
+
+
+def write_argument_files(plan, granularity, args_dir, results_dir=".", prefix=DEFAULT_PREFIX):
+    """Write one robot argument file per shard and return their paths.
+
+    Shard N writes its results to `<results_dir>/<prefix>-N/`, the layout
+    merge_reports.find_results_directories already picks up.
+    """
+    os.makedirs(args_dir, exist_ok=True)
+    option = "--test" if granularity == "test" else "--suite"
+    paths = []
+    for number, shard in enumerate(plan, start=1):
+        path = os.path.join(args_dir, f"shard-{number}.args")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"# Shard {number} of {len(plan)}: {len(shard['units'])} {granularity}s, "
+                    f"estimated {shard['estimate']:.1f}\n")
+            f.write(f"--outputdir {os.path.join(results_dir, f'{prefix}-{number}')}\n")
+            for unit in shard["units"]:
+                f.write(f"{option} {escape_pattern(unit)}\n")
+        paths.append(path)
+    return paths
+
+
+def print_plan(plan, granularity, from_history):
+    basis = "past durations" if from_history else f"{granularity} count"
+    unit = "s" if from_history else ""
+    print(f"🧩 Planned {len(plan)} shards by {basis}:")
+    for number, shard in enumerate(plan, start=1):
+        print(f"  - Shard {number}: {len(shard['units'])} {granularity}s, estimated {shard['estimate']:.1f}{unit}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split Robot Framework suites into duration-balanced shards")
+    parser.add_argument("data_sources", nargs="+", help="Test directories or files, as passed to robot")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS, help="Number of shards to plan")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="suite",
+                        help="Balance whole suite files (--suite) or individual tests (--test)")
+    parser.add_argument("--history", action="append", default=[],
+                        help="Directory with previous output.xml files to take durations from (repeatable)")
+    parser.add_argument("--args-dir", default="shards", help="Where to write shard-N.args argument files")
+    parser.add_argument("--results-dir", default="robot-test-results",
+                        help="Directory the shards write their <prefix>-N output directories into")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX, help="Output directory prefix for each shard")
+    args = parser.parse_args()
+
+    units = collect_units(args.data_sources, args.granularity)
+    if not units:
+        print(f"❌ Error: No tests found in {', '.join(args.data_sources)}.")
+        raise SystemExit(1)
+
+    history_dirs = [d for pattern in args.history for d in glob.glob(pattern) if os.path.isdir(d)]
+    durations = historical_durations(history_dirs, args.granularity)
+    plan = plan_shards(estimate_weights(units, durations), args.shards)
+    print_plan(plan, args.granularity, bool(durations))
+    for path in write_argument_files(plan, args.granularity, args.args_dir, args.results_dir, args.prefix):
+        print(f"📝 {path}")
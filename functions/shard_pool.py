@@ -0,0 +1,43 @@
+import os
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from instrumentation import measure_call
+
+
+def resolve_jobs(jobs):
+    """Return the number of worker processes to use; 0 or less means one per CPU."""
+    if jobs is None:
+        return 1
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def map_shards(func, items, jobs=1, tracer=None, span_name="shard"):
+    """Apply func to every item, fanning out across a process pool when jobs > 1.
+
+    Results are returned in input order, so reducing them in the parent gives
+    exactly the same output as the serial path. `func` must be a module-level
+    function (or a functools.partial of one) so it can be pickled. With an
+    enabled tracer, each item is measured where it runs and recorded as a
+    per-shard span.
+    """
+    items = list(items)
+    traced = tracer is not None and tracer.enabled
+    if traced:
+        func = partial(measure_call, func, span_name)
+
+    jobs = resolve_jobs(jobs)
+    if jobs == 1 or len(items) <= 1:
+        results = [func(item) for item in items]
+    else:
+        workers = min(jobs, len(items))
+        chunksize = max(1, len(items) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(func, items, chunksize=chunksize))
+
+    if not traced:
+        return results
+    for _, span in results:
+        tracer.add(span)
+    return [result for result, _ in results]
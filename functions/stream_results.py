@@ -0,0 +1,428 @@
+import os
+import re
+import html
+import mmap
+from datetime import datetime, timedelta
+from xml.etree.ElementTree import ParseError, fromstring, iterparse
+
+ENGINES = ("robot", "stream", "triage")
+LEGACY_TIMESTAMP_FORMAT = "%Y%m%d %H:%M:%S.%f"
+
+SNIFF_HEAD_BYTES = 4096
+SNIFF_TAIL_BYTES = 16384
+SNIFF_MAX_TAIL_BYTES = 1024 * 1024
+_ROOT_RE = re.compile(rb"<robot[\s>]")
+_SUITE_START_RE = re.compile(rb"<suite\s([^>]*)>")
+_STATUS_RE = re.compile(rb"<status\s([^>]*?)/?>")
+_ATTR_RE = re.compile(rb'([\w-]+)="([^"]*)"')
+_TRIAGE_TOKEN_RE = re.compile(rb"<suite\s[^>]*>|</suite>|<test\s[^>]*>|<statistics>")
+_BODY_TAGS = {"kw", "for", "iter", "while", "if", "branch", "try", "group"}
+# Messages rebot --merge writes around a test's own message (robot/result/merger.py).
+_MERGE_MESSAGE_RES = [
+    re.compile(r"\*HTML\* (?:Test|Task) added from merged output\.(?:<hr>(.*))?", re.S),
+    re.compile(r'\*HTML\* <span class="merge">(?:Test|Task) has been re-executed and results merged\.</span>'
+               r'<hr><span class="new-status">.*?<br>(?:<span class="new-message">New message:</span> (.*?)<br>)?<hr>',
+               re.S),
+    re.compile(r"\*HTML\* (?:Test|Task) has been re-executed and results merged\. Latter result had .*? "
+               r"status and was ignored\. Message:\n.*?(?:<hr>Original message:\n(.*))?", re.S),
+]
+_MERGED_HEADER = '*HTML* <span class="merge">'
+_OLD_STATUS_RE = re.compile(r'<span class="old-status">Old status:</span> <span class="[^"]*">([A-Z ]+)</span>')
+_sniff_cache = {}
+
+
+class TestRecord:
+    """Lightweight stand-in for robot.result.TestCase holding only what the reports need."""
+
+    __slots__ = ("name", "source", "lineno", "suite", "status", "message",
+                 "starttime", "endtime", "elapsed", "tags", "keywords", "attempts")
+
+    def __init__(self, name, source=None, lineno=None, suite=""):
+        self.name = name
+        self.source = source
+        self.lineno = lineno
+        self.suite = suite
+        self.status = "NOT RUN"
+        self.message = ""
+        self.starttime = None
+        self.endtime = None
+        self.elapsed = 0.0
+        self.tags = []
+        self.keywords = []
+        self.attempts = ()  # statuses of earlier attempts merged into this one, oldest first
+
+    @property
+    def longname(self):
+        return f"{self.suite}.{self.name}" if self.suite else self.name
+
+
+class SuiteRecord:
+    """Lightweight stand-in for robot.result.TestSuite without tests or keywords."""
+
+    __slots__ = ("name", "source", "longname", "status", "message",
+                 "starttime", "endtime", "elapsed")
+
+    def __init__(self, name, source=None, longname=None):
+        self.name = name
+        self.source = source
+        self.longname = longname or name
+        self.status = "NOT RUN"
+        self.message = ""
+        self.starttime = None
+        self.endtime = None
+        self.elapsed = 0.0
+
+
+def parse_status_times(attrib):
+    """Return (starttime, endtime, elapsed) from a <status> element in either RF 6 or RF 7 format.
+
+    Times are returned in the legacy 'YYYYMMDD HH:MM:SS.fff' format that
+    robot.result exposes as `starttime`/`endtime`, so callers can keep using
+    the same strptime format regardless of the engine.
+    """
+    if "start" in attrib:  # RF 7+: ISO start and elapsed seconds
+        start = datetime.fromisoformat(attrib["start"])
+        elapsed = float(attrib.get("elapsed", 0))
+        end = start + timedelta(seconds=elapsed)
+        return format_timestamp(start), format_timestamp(end), elapsed
+
+    start = parse_timestamp(attrib.get("starttime"))
+    end = parse_timestamp(attrib.get("endtime"))
+    if start is None or end is None:
+        return None, None, 0.0
+    return attrib["starttime"], attrib["endtime"], (end - start).total_seconds()
+
+
+def parse_timestamp(timestamp):
+    """Parse a robot.result style 'YYYYMMDD HH:MM:SS.fff' timestamp, or return None if it is missing."""
+    if not timestamp or timestamp == "N/A":
+        return None
+    return datetime.strptime(timestamp, LEGACY_TIMESTAMP_FORMAT)
+
+
+def format_timestamp(dt):
+    """Format a datetime the way robot.result formats `starttime`/`endtime`."""
+    return dt.strftime(LEGACY_TIMESTAMP_FORMAT)[:-3]
+
+
+class StreamingResult:
+    """Drop-in replacement for the parts of ExecutionResult the scripts use.
+
+    Parsing happens lazily in `visit()` using incremental XML parsing. Every
+    element is dropped from the tree as soon as it has been handled, so memory
+    stays bounded by the nesting depth of the file rather than by its size;
+    keyword bodies and log messages are never materialized.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.suite = None
+
+    def visit(self, visitor):
+        for event, record in self.iter_events():
+            if event == "test":
+                visitor.visit_test(record)
+            elif event == "start_suite":
+                visitor.start_suite(record)
+            else:
+                visitor.end_suite(record)
+
+    def iter_tests(self):
+        """Yield a TestRecord for every test in the file."""
+        for event, record in self.iter_events():
+            if event == "test":
+                yield record
+
+    def iter_events(self):
+        """Yield ('start_suite'|'end_suite'|'test', record) tuples in document order."""
+        stack = []
+        suites = []
+        test = None
+
+        for event, elem in iterparse(self.source, events=("start", "end")):
+            tag = elem.tag
+            if event == "end":
+                stack.pop()
+            parent = stack[-1].tag if stack else None
+
+            if event == "start":
+                stack.append(elem)
+                if tag == "suite" and parent in ("robot", "suite"):
+                    longname = elem.get("name", "")
+                    if suites:
+                        longname = f"{suites[-1].longname}.{longname}"
+                    suite = SuiteRecord(elem.get("name", ""), elem.get("source"), longname)
+                    if self.suite is None:
+                        self.suite = suite
+                    suites.append(suite)
+                    yield "start_suite", suite
+                elif tag == "test" and parent == "suite" and suites:
+                    line = elem.get("line")
+                    test = TestRecord(elem.get("name", ""), suites[-1].source,
+                                      int(line) if line else None, suites[-1].longname)
+                continue
+
+            if tag == "status" and parent == "test" and test is not None:
+                test.status = elem.get("status", "NOT RUN")
+                test.message, test.attempts = merged_message(elem.text or ""), earlier_statuses(elem.text or "")
+                test.starttime, test.endtime, test.elapsed = parse_status_times(elem.attrib)
+            elif tag == "status" and parent == "suite" and suites:
+                suite = suites[-1]
+                suite.status = elem.get("status", "NOT RUN")
+                suite.message = elem.text or ""
+                suite.starttime, suite.endtime, suite.elapsed = parse_status_times(elem.attrib)
+            elif tag == "tag" and parent == "test" and test is not None:
+                test.tags.append(elem.text or "")
+            elif tag == "test" and test is not None:
+                yield "test", test
+                test = None
+            elif tag == "suite" and suites and parent in ("robot", "suite"):
+                yield "end_suite", suites.pop()
+
+            # Drop the finished element so the partial tree never grows.
+            elem.clear()
+            if stack:
+                stack[-1].remove(elem)
+
+
+class TriageResult(StreamingResult):
+    """Failure-first reader that never parses the keyword trees of tests that did not fail.
+
+    The file is memory-mapped and scanned for suite and test tags only. Tests
+    cannot nest, so each test is skipped in one jump to its `</test>`, and its
+    status is the last <status> before that. Only FAIL tests are handed to
+    the XML parser to recover their message and failing keyword chain; every
+    other test becomes a record with just its name, line, status, message and
+    elapsed time, so the counts stay exact while almost none of a green file
+    is parsed.
+    """
+
+    def iter_events(self):
+        with open(self.source, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from self._iter_events(buf)
+
+    def _iter_events(self, buf):
+        suites = []
+        pos = 0
+        while True:
+            match = _TRIAGE_TOKEN_RE.search(buf, pos)
+            if match is None or match.group() == b"<statistics>":
+                return
+            token = match.group()
+            if token.startswith(b"<test"):
+                end = buf.find(b"</test>", match.end())
+                if end == -1 or not suites:
+                    raise ValueError(f"Unterminated <test> in {self.source}")
+                yield "test", self._test_record(buf, match, end, suites[-1])
+                pos = end + len(b"</test>")
+            elif token == b"</suite>":
+                suite = suites.pop()
+                status = _STATUS_RE.match(buf, buf.rfind(b"<status", pos, match.start()))
+                if status:
+                    attrs = _parse_attributes(status.group(1))
+                    suite.status = attrs.get("status", "NOT RUN")
+                    suite.starttime, suite.endtime, suite.elapsed = parse_status_times(attrs)
+                yield "end_suite", suite
+                pos = match.end()
+            else:
+                attrs = _parse_attributes(token)
+                name = attrs.get("name", "")
+                longname = f"{suites[-1].longname}.{name}" if suites else name
+                suite = SuiteRecord(name, attrs.get("source"), longname)
+                if self.suite is None:
+                    self.suite = suite
+                suites.append(suite)
+                yield "start_suite", suite
+                pos = match.end()
+
+    def _test_record(self, buf, match, end, suite):
+        attrs = _parse_attributes(match.group())
+        line = attrs.get("line")
+        test = TestRecord(attrs.get("name", ""), suite.source, int(line) if line else None, suite.longname)
+        status = _STATUS_RE.match(buf, buf.rfind(b"<status", match.end(), end))
+        if not status:
+            return test
+        status_attrs = _parse_attributes(status.group(1))
+        test.status = status_attrs.get("status", "NOT RUN")
+        if test.status != "FAIL" and "elapsed" in status_attrs:
+            test.elapsed = float(status_attrs["elapsed"])  # RF 7: no need to format timestamps nobody reads
+        else:
+            test.starttime, test.endtime, test.elapsed = parse_status_times(status_attrs)
+
+        if test.status == "FAIL":
+            element = fromstring(buf[match.start():end + len(b"</test>")])
+            message = element.findtext("status") or ""
+            test.message, test.attempts = merged_message(message), earlier_statuses(message)
+            test.tags = [tag.text or "" for tag in element.iter("tag")]
+            test.keywords = failed_keyword_chain(element)
+        elif not status.group().endswith(b"/>"):
+            text_end = buf.find(b"</status>", status.end(), end)
+            message = html.unescape(buf[status.end():text_end].decode("utf-8", "replace"))
+            test.message, test.attempts = merged_message(message), earlier_statuses(message)
+        return test
+
+
+def merged_message(message):
+    """Return the test's own message from one rewritten by rebot --merge; other messages are returned as is.
+
+    Merged outputs wrap the latest attempt's message in HTML that also
+    carries the earlier attempt's status and message; reports want only the
+    message the kept attempt produced.
+    """
+    if not message.startswith("*HTML* "):
+        return message
+    for pattern in _MERGE_MESSAGE_RES:
+        match = pattern.match(message)
+        if match:
+            return html.unescape(match.group(1) or "")
+    return message
+
+
+def earlier_statuses(message):
+    """Statuses of the attempts a rebot --merge output replaced, oldest first; empty for any other message.
+
+    They survive only in the merge HTML that merged_message strips, and are
+    what flaky detection needs when retries were merged before reporting.
+    """
+    if not message.startswith(_MERGED_HEADER):
+        return ()
+    return tuple(reversed(_OLD_STATUS_RE.findall(message)))
+
+
+def failed_keyword_chain(element):
+    """Return the names along the path of failing keywords and control structures below element."""
+    chain = []
+    while True:
+        element = next((child for child in element if child.tag in _BODY_TAGS
+                        and child.find("status") is not None and child.find("status").get("status") == "FAIL"),
+                       None)
+        if element is None:
+            return chain
+        if element.tag == "kw":
+            library = element.get("owner") or element.get("library")
+            name = element.get("name", "")
+            chain.append(f"{library}.{name}" if library else name)
+        else:
+            chain.append(element.get("type") or element.tag.upper())
+
+
+class RobotResult:
+    """robot.api.ExecutionResult behind the same visit() interface as the streaming readers.
+
+    Robot is imported only when a result is opened with this engine, and
+    visitors only need start_suite/visit_test/end_suite, not robot's
+    ResultVisitor. Suites are walked in robot's order: child suites, then tests.
+    """
+
+    def __init__(self, source):
+        from robot.api import ExecutionResult
+
+        self.source = source
+        self.result = ExecutionResult(source)
+        self.suite = self.result.suite
+
+    def visit(self, visitor):
+        self._visit_suite(self.suite, visitor)
+
+    def _visit_suite(self, suite, visitor):
+        visitor.start_suite(suite)
+        for child in suite.suites:
+            self._visit_suite(child, visitor)
+        for test in suite.tests:
+            visitor.visit_test(test)
+        visitor.end_suite(suite)
+
+
+def load_result(output_file, engine="robot", use_index=False):
+    """Open an output.xml with the selected engine; all results support `.visit()` and `.suite`.
+
+    With use_index, an up-to-date binary result index next to the file is
+    read instead, and the XML is only parsed when there is none.
+    """
+    if use_index:
+        from result_index import open_index
+        index = open_index(output_file)
+        if index is not None:
+            return index
+    if engine == "stream":
+        return StreamingResult(output_file)
+    if engine == "triage":
+        return TriageResult(output_file)
+    if engine == "robot":
+        return RobotResult(output_file)
+    raise ValueError(f"Unknown result engine '{engine}', expected one of {', '.join(ENGINES)}")
+
+
+def _parse_attributes(raw):
+    attrs = {key.decode(): value.decode("utf-8", "replace") for key, value in _ATTR_RE.findall(raw)}
+    if b"&" in raw:
+        attrs = {key: html.unescape(value) for key, value in attrs.items()}
+    return attrs
+
+
+def read_top_suite(output_file):
+    """Return a SuiteRecord for the top-level suite of an output.xml, or None if it is not one.
+
+    Only the first and last few KB are read: the root element is sniffed from
+    the head and the suite's own <status> is the last one before <statistics>
+    in the tail. Results are cached per path, size and mtime so later stages
+    never reopen the file just to get its timestamps.
+    """
+    try:
+        stat = os.stat(output_file)
+    except OSError:
+        return None
+    key = (os.path.abspath(output_file), stat.st_size, stat.st_mtime_ns)
+    if key in _sniff_cache:
+        return _sniff_cache[key]
+
+    suite = None
+    with open(output_file, "rb") as f:
+        head = f.read(SNIFF_HEAD_BYTES)
+        if _ROOT_RE.search(head):
+            suite = _read_top_suite_tail(f, head, stat.st_size)
+    if suite is None and _ROOT_RE.search(head):
+        suite = _read_top_suite_streaming(output_file)
+
+    _sniff_cache[key] = suite
+    return suite
+
+
+def _read_top_suite_tail(f, head, size):
+    match = _SUITE_START_RE.search(head)
+    if not match:
+        return None
+    attrs = _parse_attributes(match.group(1))
+    suite = SuiteRecord(attrs.get("name", ""), attrs.get("source"))
+
+    window = SNIFF_TAIL_BYTES
+    while True:
+        window = min(window, size)
+        f.seek(size - window)
+        tail = f.read(window)
+        end = tail.rfind(b"<statistics>")
+        statuses = _STATUS_RE.findall(tail, 0, end) if end != -1 else []
+        if statuses:
+            break
+        if window >= min(size, SNIFF_MAX_TAIL_BYTES):
+            return None
+        window *= 4
+
+    status = _parse_attributes(statuses[-1])
+    suite.status = status.get("status", "NOT RUN")
+    suite.starttime, suite.endtime, suite.elapsed = parse_status_times(status)
+    return suite
+
+
+def _read_top_suite_streaming(output_file):
+    # Huge <statistics>/<errors> sections push the suite status out of the
+    # tail window; fall back to a bounded-memory pass over the whole file.
+    top = None
+    try:
+        result = StreamingResult(output_file)
+        for event, record in result.iter_events():
+            if event == "end_suite":
+                top = record
+    except (ParseError, ValueError):
+        return None
+    return top
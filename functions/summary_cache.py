@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from shard_pool import map_shards
+
+DEFAULT_CACHE_PATH = ".robot-summary-cache.sqlite"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_MISSING = object()
+
+
+class SummaryCache:
+    """Persistent per-shard summary cache backed by SQLite.
+
+    Summaries are keyed by the shard's content hash plus a `kind` (which
+    extractor produced them), so a shard re-downloaded from an unchanged job
+    is a hit even though its path and mtime differ. The hash itself is
+    memoized by path/size/mtime so unchanged files are not re-read. Entries
+    are evicted least-recently-used once their total size exceeds max_bytes.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, rebuild=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        if rebuild:
+            self.db.executescript("DROP TABLE IF EXISTS summaries; DROP TABLE IF EXISTS files;")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                digest TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (digest, kind)
+            );
+            CREATE INDEX IF NOT EXISTS summaries_last_used ON summaries (last_used);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            );
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def digest(self, filepath):
+        """Return the content hash of a file, reusing the stored one if size and mtime are unchanged."""
+        path = os.path.abspath(filepath)
+        stat = os.stat(path)
+        row = self.db.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        self.db.execute("INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+                        (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def get(self, filepath, kind, default=None):
+        """Return the cached summary of `kind` for a file, or default on a miss."""
+        digest = self.digest(filepath)
+        row = self.db.execute("SELECT summary FROM summaries WHERE digest = ? AND kind = ?",
+                              (digest, kind)).fetchone()
+        if row is None:
+            return default
+        self.db.execute("UPDATE summaries SET last_used = ? WHERE digest = ? AND kind = ?",
+                        (time.time(), digest, kind))
+        return json.loads(row[0])
+
+    def put(self, filepath, kind, summary):
+        """Store a JSON-serializable summary of `kind` for a file."""
+        encoded = json.dumps(summary, separators=(",", ":"))
+        self.db.execute(
+            "INSERT OR REPLACE INTO summaries (digest, kind, summary, size, last_used) VALUES (?, ?, ?, ?, ?)",
+            (self.digest(filepath), kind, encoded, len(encoded), time.time()))
+
+    def evict(self):
+        """Drop least-recently-used summaries until the cache fits in max_bytes."""
+        kept = 0
+        stale = []
+        for digest, kind, size in self.db.execute(
+                "SELECT digest, kind, size FROM summaries ORDER BY last_used DESC"):
+            kept += size
+            if kept > self.max_bytes:
+                stale.append((digest, kind))
+        self.db.executemany("DELETE FROM summaries WHERE digest = ? AND kind = ?", stale)
+        self.db.execute("DELETE FROM files WHERE digest NOT IN (SELECT digest FROM summaries)")
+        return len(stale)
+
+    def close(self):
+        self.evict()
+        self.db.commit()
+        self.db.close()
+
+
+def cached_map(cache, kind, func, files, jobs=1, encode=None, decode=None, tracer=None, span_name="shard",
+               key=None):
+    """Like map_shards, but only runs func on files whose summary is not already cached.
+
+    `encode`/`decode` convert func's return value to and from JSON-friendly
+    data when it is not a plain dict. `key` maps a file to the file whose
+    content is hashed for the cache lookup, e.g. a small index that func
+    reads instead of the file itself. Results keep input order.
+    """
+    files = list(files)
+    if cache is None:
+        return map_shards(func, files, jobs, tracer, span_name)
+
+    keys = [key(filepath) for filepath in files] if key else files
+    results = []
+    misses = []
+    for i, filepath in enumerate(keys):
+        cached = cache.get(filepath, kind, _MISSING)
+        if cached is _MISSING:
+            misses.append(i)
+            results.append(None)
+        else:
+            results.append(decode(cached) if decode else cached)
+
+    print(f"Summary cache: {len(files) - len(misses)} hits, parsing {len(misses)} new or changed shards")
+    for i, value in zip(misses, map_shards(func, [files[i] for i in misses], jobs, tracer, span_name)):
+        cache.put(keys[i], kind, encode(value) if encode else value)
+        results[i] = value
+    return results
@@ -0,0 +1,65 @@
+import heapq
+from markdown_report import markdown_cell
+from stream_results import parse_timestamp
+
+DEFAULT_SLOWEST = 10
+
+
+def shard_elapsed(starttime, endtime):
+    """Seconds between a shard's suite start and end timestamps, or 0.0 if either is missing."""
+    start = parse_timestamp(starttime)
+    end = parse_timestamp(endtime)
+    if start is None or end is None:
+        return 0.0
+    return max((end - start).total_seconds(), 0.0)
+
+
+def slowest(items, n=DEFAULT_SLOWEST):
+    """Return the n [elapsed, name] pairs with the largest elapsed time, slowest first."""
+    return [list(item) for item in heapq.nlargest(n, items, key=lambda item: item[0])]
+
+
+def build_timing_model(summaries, n=DEFAULT_SLOWEST):
+    """Combine per-shard summaries into a run-level timing model.
+
+    `wall_s` is the critical path: from the earliest shard start to the latest
+    shard end, which is what a parallel run actually costs. `shard_s` is the
+    sum of every shard's own duration, i.e. the runner time spent. Their ratio
+    is the effective parallelism.
+    """
+    starts = [parse_timestamp(s.get("starttime")) for s in summaries]
+    ends = [parse_timestamp(s.get("endtime")) for s in summaries]
+    starts = [start for start in starts if start is not None]
+    ends = [end for end in ends if end is not None]
+    wall = max((max(ends) - min(starts)).total_seconds(), 0.0) if starts and ends else 0.0
+    shard_total = sum(s.get("elapsed", 0.0) for s in summaries)
+
+    return {
+        "wall_s": round(wall, 3),
+        "shard_s": round(shard_total, 3),
+        "parallelism": round(shard_total / wall, 2) if wall else 0.0,
+        "slowest_tests": slowest((item for s in summaries for item in s.get("slowest_tests", [])), n),
+        "slowest_suites": slowest((item for s in summaries for item in s.get("slowest_suites", [])), n),
+    }
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}m {seconds:.1f}s" if minutes else f"{seconds:.2f}s"
+
+
+def timing_markdown(model):
+    """Render the timing model as a Markdown section for the check-run summary."""
+    lines = [
+        "### ⏱️ Timing\n",
+        f"- 🕒 **Wall time (critical path):** {format_duration(model['wall_s'])}",
+        f"- 🧮 **Summed shard time:** {format_duration(model['shard_s'])}",
+    ]
+    if model["parallelism"]:
+        lines.append(f"- ⚡ **Effective parallelism:** {model['parallelism']}x")
+    for key, label in (("slowest_suites", "Slowest Suites"), ("slowest_tests", "Slowest Tests")):
+        if model[key]:
+            lines.append(f"\n| {label} | Duration |\n|------|----------|")
+            lines.extend(f"| {markdown_cell(name)} | {format_duration(elapsed)} |"
+                         for elapsed, name in model[key])
+    return "\n".join(lines) + "\n"